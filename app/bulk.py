@@ -0,0 +1,42 @@
+from typing import Any
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+
+
+def bulk_openapi(schema) -> dict:
+    """
+    openapi_extra de un endpoint de lote: el cuerpo se recibe sin validar (list[Any])
+    pero se documenta como un arreglo de `schema`.
+    """
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": {"type": "array", "items": {"$ref": f"#/components/schemas/{schema.__name__}"}}}},
+        }
+    }
+
+
+def validate_items(schema, items: list[Any], partial: bool):
+    """
+    Valida cada elemento del lote con `schema` por separado.
+
+    Devuelve (índices, elementos válidos, errores) donde cada error es
+    {"index", "detail"}. Sin `partial` cualquier elemento inválido responde 422 para
+    todo el lote, con el mismo formato que la validación de FastAPI.
+    """
+    indexes, valid, errors, details = [], [], [], []
+    for index, item in enumerate(items):
+        try:
+            valid.append(schema.model_validate(item))
+        except ValidationError as error:
+            problems = error.errors(include_url=False)
+            details += [{**problem, "loc": ("body", index, *problem["loc"])} for problem in problems]
+            errors.append({
+                "index": index,
+                "detail": "; ".join(f"{'.'.join(map(str, problem['loc'])) or 'item'}: {problem['msg']}" for problem in problems),
+            })
+            continue
+        indexes.append(index)
+    if details and not partial:
+        raise RequestValidationError(details)
+    return indexes, valid, errors
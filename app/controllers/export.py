@@ -0,0 +1,26 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from ..services.databaseService import DatabaseService, DBSession
+from ..services.exportService import MEDIA_TYPES, export_service
+
+
+router = APIRouter(prefix="/export", tags=["Exportacion"])
+
+database_service = DatabaseService()
+
+@router.get("/{entity}")
+async def export_entity(
+    entity: Literal["pois", "flora", "fauna"],
+    format: Literal["ndjson", "json"] = "ndjson",
+    chunk_size: int = Query(1000, gt=0, le=10000, description="Filas leídas y enviadas por bloque"),
+    db: DBSession = Depends(database_service.get_read_db),
+):
+    """
+    Exporta la tabla completa ordenada por id, en streaming.
+    """
+    return StreamingResponse(
+        export_service.stream(db, entity, format, chunk_size),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{entity}.{format}"'},
+    )
@@ -1,35 +1,80 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Annotated, Any, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from pydantic import TypeAdapter
 from .. import crud, schemas
-from ..services.databaseService import DatabaseService
+from ..bulk import bulk_openapi, validate_items
+from ..pagination import decode_cursor, next_cursor_headers
+from ..serialization import FIELDS_DESCRIPTION, RowSerializer, parse_fields
+from ..services.cacheService import cache_service
+from ..services.databaseService import DatabaseService, DBSession
 
 
 router = APIRouter(prefix="/fauna",tags=["Fauna"])
 
 database_service = DatabaseService()
 
+fauna_adapter = TypeAdapter(schemas.Fauna)
+fauna_list_serializer = RowSerializer(schemas.Fauna)
+
 @router.get("/getAllFauna", response_model=list[schemas.Fauna])
-def read_fauna(skip: int = 0, limit: int = 10, db: Session = Depends(database_service.get_db)):
-    fauna = crud.get_fauna(db, skip=skip, limit=limit)
-    return fauna
+async def read_fauna(skip: int = 0, limit: int = 10, cursor: Optional[str] = None, especie: Optional[str] = None, habitat: Optional[str] = None, poi_id: Optional[int] = None, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), db: DBSession = Depends(database_service.get_read_db)):
+    after_id = decode_cursor(cursor)
+    requested = parse_fields(fields, schemas.Fauna)
+    key = cache_service.list_key("fauna", skip=skip, limit=limit, cursor=cursor, especie=especie, habitat=habitat, poi_id=poi_id, fields=",".join(requested) if requested else None)
+    cached = cache_service.get(key)
+    if cached is not None:
+        return cached
+    serializer = fauna_list_serializer if requested is None else RowSerializer(schemas.Fauna, requested)
+    fauna = await database_service.run(db, crud.get_fauna, skip=skip, limit=limit, after_id=after_id, fields=serializer.fields, especie=especie, habitat=habitat, poi_id=poi_id)
+    return cache_service.store(key, serializer.dump_json(fauna), headers=next_cursor_headers(fauna, limit))
 
 @router.get("/getFaunaById/{fauna_id}", response_model=schemas.Fauna)
-def read_fauna_by_id(fauna_id: int, db: Session = Depends(database_service.get_db)):
-    db_fauna = crud.get_fauna_by_id(db, fauna_id=fauna_id)
+async def read_fauna_by_id(fauna_id: int, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), db: DBSession = Depends(database_service.get_read_db)):
+    requested = parse_fields(fields, schemas.Fauna)
+    key = cache_service.detail_key("fauna", fauna_id, fields=",".join(requested) if requested else None)
+    cached = cache_service.get(key)
+    if cached is not None:
+        return cached
+    if requested is None:
+        db_fauna = await database_service.run(db, crud.get_fauna_by_id, fauna_id=fauna_id)
+        if db_fauna is None:
+            raise HTTPException(status_code=404, detail="Fauna not found")
+        return cache_service.response(key, fauna_adapter, db_fauna)
+    # Solo las columnas de los campos pedidos
+    serializer = RowSerializer(schemas.Fauna, requested)
+    db_fauna = await database_service.run(db, crud.get_fauna_by_id, fauna_id=fauna_id, fields=serializer.fields)
     if db_fauna is None:
         raise HTTPException(status_code=404, detail="Fauna not found")
-    return db_fauna
+    return cache_service.store(key, serializer.dump_item(db_fauna))
 
 @router.post("/createFauna", response_model=schemas.Fauna)
-def create_fauna(fauna: schemas.FaunaCreate, db: Session = Depends(database_service.get_db)):
-    # Verificar si el POI existe
-    poi = crud.get_poi_by_id(db, fauna.poi_id)
-    if poi is None:
+async def create_fauna(fauna: schemas.FaunaCreate, db: DBSession = Depends(database_service.get_db)):
+    # El INSERT valida el POI en la misma sentencia
+    db_fauna = await database_service.run(db, crud.create_fauna, fauna=fauna)
+    if db_fauna is None:
         raise HTTPException(status_code=404, detail="No se encontro el Punto de interes con el id {}".format(fauna.poi_id))
-    
-    return crud.create_fauna(db=db, fauna=fauna)
+    return db_fauna
+
+@router.post("/bulk", response_model=schemas.FaunaBulkResult, openapi_extra=bulk_openapi(schemas.FaunaCreate))
+async def create_fauna_bulk(fauna_items: Annotated[list[Any], Body(max_length=schemas.BULK_MAX_ITEMS)], partial: bool = False, db: DBSession = Depends(database_service.get_db)):
+    # Con partial=true cada elemento se valida por separado y los inválidos se reportan en errors
+    indexes, valid, errors = validate_items(schemas.FaunaCreate, fauna_items, partial)
+    # Los POIs de todo el lote se validan en una sola consulta
+    created, missing = await database_service.run(db, crud.create_fauna_bulk, valid, partial=partial)
+    missing_errors = [
+        {"index": indexes[index], "detail": "No se encontro el Punto de interes con el id {}".format(valid[index].poi_id)}
+        for index in missing
+    ]
+    if missing_errors and not partial:
+        raise HTTPException(status_code=404, detail=missing_errors)
+    return {"created": created, "errors": sorted(errors + missing_errors, key=lambda error: error["index"])}
 
 @router.delete("/deleteFaunaById/{fauna_id}")
-def delete_fauna(fauna_id: int, db: Session = Depends(database_service.get_db)):
-    crud.delete_fauna(db=db, fauna_id=fauna_id)
-    return {"message": "Fauna deleted"}
\ No newline at end of file
+async def delete_fauna(fauna_id: int, db: DBSession = Depends(database_service.get_db)):
+    await database_service.run(db, crud.delete_fauna, fauna_id=fauna_id)
+    return {"message": "Fauna deleted"}
+
+@router.post("/bulkDelete", response_model=schemas.BulkDeleteResult)
+async def delete_fauna_bulk(fauna_ids: Annotated[list[int], Body(max_length=schemas.BULK_MAX_ITEMS)], db: DBSession = Depends(database_service.get_db)):
+    deleted = await database_service.run(db, crud.delete_fauna_bulk, fauna_ids)
+    return {"deleted": deleted, "not_found": sorted(set(fauna_ids) - set(deleted))}
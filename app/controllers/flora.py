@@ -1,47 +1,98 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Annotated, Any, Optional
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from pydantic import TypeAdapter
 from sqlalchemy.exc import InterfaceError
 from .. import crud, schemas
-from ..services.databaseService import DatabaseService
+from ..bulk import bulk_openapi, validate_items
+from ..pagination import decode_cursor, next_cursor_headers
+from ..serialization import FIELDS_DESCRIPTION, RowSerializer, parse_fields
+from ..services.cacheService import cache_service
+from ..services.databaseService import DatabaseService, DBSession
 
 router = APIRouter(prefix="/flora", tags=["Flora"])
 
 database_service = DatabaseService()
 
+flora_adapter = TypeAdapter(schemas.Flora)
+flora_list_serializer = RowSerializer(schemas.Flora)
+
 @router.get("/getAllFlora", response_model=list[schemas.Flora])
-def read_flora(skip: int = 0, limit: int = 10, db: Session = Depends(database_service.get_db)):
+async def read_flora(skip: int = 0, limit: int = 10, cursor: Optional[str] = None, familia: Optional[str] = None, poi_id: Optional[int] = None, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), db: DBSession = Depends(database_service.get_read_db)):
+    after_id = decode_cursor(cursor)
+    requested = parse_fields(fields, schemas.Flora)
+    key = cache_service.list_key("flora", skip=skip, limit=limit, cursor=cursor, familia=familia, poi_id=poi_id, fields=",".join(requested) if requested else None)
+    cached = cache_service.get(key)
+    if cached is not None:
+        return cached
     try:
-        flora = crud.get_flora(db, skip=skip, limit=limit)
-        return flora
+        serializer = flora_list_serializer if requested is None else RowSerializer(schemas.Flora, requested)
+        flora = await database_service.run(db, crud.get_flora, skip=skip, limit=limit, after_id=after_id, fields=serializer.fields, familia=familia, poi_id=poi_id)
+        return cache_service.store(key, serializer.dump_json(flora), headers=next_cursor_headers(flora, limit))
     except InterfaceError:
         raise HTTPException(status_code=500, detail="Database connection error")
 
 @router.get("/getFloraById/{flora_id}", response_model=schemas.Flora)
-def read_flora_by_id(flora_id: int, db: Session = Depends(database_service.get_db)):
+async def read_flora_by_id(flora_id: int, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), db: DBSession = Depends(database_service.get_read_db)):
+    requested = parse_fields(fields, schemas.Flora)
+    key = cache_service.detail_key("flora", flora_id, fields=",".join(requested) if requested else None)
+    cached = cache_service.get(key)
+    if cached is not None:
+        return cached
     try:
-        db_flora = crud.get_flora_by_id(db, flora_id=flora_id)
+        if requested is None:
+            db_flora = await database_service.run(db, crud.get_flora_by_id, flora_id=flora_id)
+            if db_flora is None:
+                raise HTTPException(status_code=404, detail="Flora not found")
+            return cache_service.response(key, flora_adapter, db_flora)
+        # Solo las columnas de los campos pedidos
+        serializer = RowSerializer(schemas.Flora, requested)
+        db_flora = await database_service.run(db, crud.get_flora_by_id, flora_id=flora_id, fields=serializer.fields)
         if db_flora is None:
             raise HTTPException(status_code=404, detail="Flora not found")
-        return db_flora
+        return cache_service.store(key, serializer.dump_item(db_flora))
     except InterfaceError:
         raise HTTPException(status_code=500, detail="Database connection error")
 
 @router.post("/flora/", response_model=schemas.Flora)
-def create_flora(flora: schemas.FloraCreate, db: Session = Depends(database_service.get_db)):
+async def create_flora(flora: schemas.FloraCreate, db: DBSession = Depends(database_service.get_db)):
+    try:
+        # El INSERT valida el POI en la misma sentencia
+        db_flora = await database_service.run(db, crud.create_flora, flora=flora)
+    except InterfaceError:
+        raise HTTPException(status_code=500, detail="Database connection error")
+    if db_flora is None:
+        raise HTTPException(status_code=404, detail="No se encontro el Punto de interes con el id {}".format(flora.poi_id))
+    return db_flora
+
+@router.post("/bulk", response_model=schemas.FloraBulkResult, openapi_extra=bulk_openapi(schemas.FloraCreate))
+async def create_flora_bulk(flora_items: Annotated[list[Any], Body(max_length=schemas.BULK_MAX_ITEMS)], partial: bool = False, db: DBSession = Depends(database_service.get_db)):
+    # Con partial=true cada elemento se valida por separado y los inválidos se reportan en errors
+    indexes, valid, errors = validate_items(schemas.FloraCreate, flora_items, partial)
     try:
-        # Verificar si el POI existe
-        poi = crud.get_poi_by_id(db, flora.poi_id)
-        if poi is None:
-            raise HTTPException(status_code=404, detail="No se encontro el Punto de interes con el id {}".format(flora.poi_id))
-        
-        return crud.create_flora(db=db, flora=flora)
+        # Los POIs de todo el lote se validan en una sola consulta
+        created, missing = await database_service.run(db, crud.create_flora_bulk, valid, partial=partial)
     except InterfaceError:
         raise HTTPException(status_code=500, detail="Database connection error")
+    missing_errors = [
+        {"index": indexes[index], "detail": "No se encontro el Punto de interes con el id {}".format(valid[index].poi_id)}
+        for index in missing
+    ]
+    if missing_errors and not partial:
+        raise HTTPException(status_code=404, detail=missing_errors)
+    return {"created": created, "errors": sorted(errors + missing_errors, key=lambda error: error["index"])}
 
 @router.delete("/flora/{flora_id}")
-def delete_flora(flora_id: int, db: Session = Depends(database_service.get_db)):
+async def delete_flora(flora_id: int, db: DBSession = Depends(database_service.get_db)):
     try:
-        crud.delete_flora(db=db, flora_id=flora_id)
+        await database_service.run(db, crud.delete_flora, flora_id=flora_id)
         return {"message": "Flora deleted"}
     except InterfaceError:
-        raise HTTPException(status_code=500, detail="Database connection error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Database connection error")
+
+@router.post("/bulkDelete", response_model=schemas.BulkDeleteResult)
+async def delete_flora_bulk(flora_ids: Annotated[list[int], Body(max_length=schemas.BULK_MAX_ITEMS)], db: DBSession = Depends(database_service.get_db)):
+    try:
+        deleted = await database_service.run(db, crud.delete_flora_bulk, flora_ids)
+    except InterfaceError:
+        raise HTTPException(status_code=500, detail="Database connection error")
+    return {"deleted": deleted, "not_found": sorted(set(flora_ids) - set(deleted))}
@@ -1,38 +1,32 @@
 from fastapi import APIRouter, File, UploadFile, Depends
-from ..environment import serviceAccountKey
-from ..services.storageService import FirebaseStorageService
+from ..services.storageService import storage_service
 
 # Create a router for image-related endpoints
 router = APIRouter(prefix="/images", tags=["images"])
 
-# Initialize Firebase Storage Service
-"""
-storage_service = FirebaseStorageService(
-    cred=env.cred, 
-    bucket_name='my-project-4848-1683442933444.firebasestorage.appspot.com'
-)"""
-storage_service = FirebaseStorageService()
+# The storage backend (Firebase or local disk, see STORAGE_BACKEND) is
+# initialized on the first upload, not when the app boots
 
 @router.post("/upload")
 async def upload_image(file: UploadFile = File(...)):
     """
-    Endpoint to upload an image to Firebase Storage
-    
+    Endpoint to upload an image to the configured storage
+
     :param file: Image file to upload
-    :return: Dictionary with the public URL of the uploaded image
+    :return: Dictionary with the public URL of the uploaded image and of its derivatives
     """
     try:
-        # Upload the image and get its public URL
-        image_url = await storage_service.upload_image(file)
-        
+        # Upload the image and get the public URL of every variant
+        urls = await storage_service.upload_image(file)
+
         return {
             "status": "success",
-            "url": image_url
+            "url": urls["original"],
+            "variants": urls
         }
-    
+
     except Exception as e:
         return {
             "status": "error",
             "message": str(e)
         }
-
@@ -1,32 +1,166 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Annotated, Any, Optional, Union
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Response
+from pydantic import TypeAdapter
 from .. import crud, schemas
-from ..services.databaseService import DatabaseService
+from ..bulk import bulk_openapi, validate_items
+from ..pagination import decode_cursor, next_cursor_headers
+from ..serialization import FIELDS_DESCRIPTION, RowSerializer, parse_fields
+from ..services.cacheService import cache_service
+from ..services.databaseService import DatabaseService, DBSession
+from ..services.tileService import TILE_MEDIA_TYPE, tile_service
 
 
 router = APIRouter(prefix="/poi",tags=["Punto de Interes"])
 
 database_service = DatabaseService()
 
-@router.get("/getAllPois", response_model=list[schemas.POI])
-def read_pois(skip: int = 0, limit: int = 10, db: Session = Depends(database_service.get_db)):
-    pois = crud.get_pois(db, skip=skip, limit=limit)
-    return pois
+poi_adapter = TypeAdapter(schemas.POI)
+poi_simple_adapter = TypeAdapter(schemas.POISimple)
+poi_summary_adapter = TypeAdapter(schemas.POISummary)
+poi_children_serializers = {"flora": RowSerializer(schemas.Flora), "fauna": RowSerializer(schemas.Fauna)}
+poi_list_serializer = RowSerializer(schemas.POI, **poi_children_serializers)
+poi_simple_list_serializer = RowSerializer(schemas.POISimple)
+poi_summary_list_serializer = RowSerializer(schemas.POISummary)
 
+def _poi_serializer(include_children: bool, requested: Optional[list[str]]) -> RowSerializer:
+    if requested is None:
+        return poi_list_serializer if include_children else poi_simple_list_serializer
+    if include_children:
+        return RowSerializer(schemas.POI, requested, **poi_children_serializers)
+    return RowSerializer(schemas.POISimple, requested)
 
-@router.get("/getPoiById/{poi_id}", response_model=schemas.POI)
-def read_poi_by_id(poi_id: int, db: Session = Depends(database_service.get_db)):
-    db_poi = crud.get_poi_by_id(db, poi_id=poi_id)
+
+@router.get("/getAllPois", response_model=list[Union[schemas.POI, schemas.POISimple]])
+async def read_pois(skip: int = 0, limit: int = 10, include_children: bool = True, cursor: Optional[str] = None, tipo: Optional[str] = None, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), db: DBSession = Depends(database_service.get_read_db)):
+    after_id = decode_cursor(cursor)
+    requested = parse_fields(fields, schemas.POI if include_children else schemas.POISimple)
+    key = cache_service.list_key("poi", skip=skip, limit=limit, include_children=include_children, cursor=cursor, tipo=tipo, fields=",".join(requested) if requested else None)
+    cached = cache_service.get(key)
+    if cached is not None:
+        return cached
+    # Sin flora ni fauna el mapa recibe solo las filas de los POIs
+    serializer = _poi_serializer(include_children, requested)
+    pois = await database_service.run(db, crud.get_pois, skip=skip, limit=limit, after_id=after_id, fields=serializer.fields, tipo=tipo)
+    return cache_service.store(key, serializer.dump_json(pois), headers=next_cursor_headers(pois, limit))
+
+
+@router.get("/getPoiById/{poi_id}", response_model=Union[schemas.POI, schemas.POISimple, schemas.POISummary])
+async def read_poi_by_id(poi_id: int, include_children: bool = True, summary: bool = False, fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION), db: DBSession = Depends(database_service.get_read_db)):
+    if summary and fields is not None:
+        raise HTTPException(status_code=400, detail="fields is not supported with summary")
+    requested = parse_fields(fields, schemas.POI if include_children else schemas.POISimple)
+    key = cache_service.detail_key("poi", poi_id, include_children=include_children, summary=summary, fields=",".join(requested) if requested else None)
+    cached = cache_service.get(key)
+    if cached is not None:
+        return cached
+    if requested is not None:
+        # Solo las columnas de los campos pedidos (y flora o fauna si se piden)
+        serializer = _poi_serializer(include_children, requested)
+        db_poi = await database_service.run(db, crud.get_poi_by_id, poi_id=poi_id, fields=serializer.fields)
+        if db_poi is None:
+            raise HTTPException(status_code=404, detail="POI not found")
+        return cache_service.store(key, serializer.dump_item(db_poi))
+    if summary:
+        # Cantidad de flora y fauna en lugar de las listas completas
+        db_poi = await database_service.run(db, crud.get_poi_summary, poi_id=poi_id)
+        adapter = poi_summary_adapter
+    else:
+        db_poi = await database_service.run(db, crud.get_poi_by_id, poi_id=poi_id, include_children=include_children)
+        adapter = poi_adapter if include_children else poi_simple_adapter
     if db_poi is None:
         raise HTTPException(status_code=404, detail="POI not found")
-    return db_poi
+    return cache_service.response(key, adapter, db_poi)
+
+
+@router.get("/summary", response_model=list[schemas.POISummary])
+async def read_poi_summaries(skip: int = 0, limit: int = 10, cursor: Optional[str] = None, db: DBSession = Depends(database_service.get_read_db)):
+    after_id = decode_cursor(cursor)
+    key = cache_service.list_key("poi", summary=True, skip=skip, limit=limit, cursor=cursor)
+    cached = cache_service.get(key)
+    if cached is not None:
+        return cached
+    pois = await database_service.run(db, crud.get_poi_summaries, skip=skip, limit=limit, after_id=after_id)
+    return cache_service.store(key, poi_summary_list_serializer.dump_json(pois), headers=next_cursor_headers(pois, limit))
+
+
+@router.get("/nearby", response_model=list[schemas.POINearby])
+async def read_pois_nearby(
+    lat: float = Query(ge=-90, le=90),
+    lon: float = Query(ge=-180, le=180),
+    radius: float = Query(1000, gt=0, le=500000, description="Radio en metros"),
+    limit: int = Query(100, gt=0, le=5000),
+    db: DBSession = Depends(database_service.get_read_db),
+):
+    results = await database_service.run(db, crud.get_pois_nearby, lat=lat, lon=lon, radius=radius, limit=limit)
+    return [{**point._asdict(), "distancia": distance} for point, distance in results]
+
+
+@router.get("/bbox", response_model=list[schemas.POILocation])
+async def read_pois_in_bbox(
+    min_lat: float = Query(ge=-90, le=90),
+    min_lon: float = Query(ge=-180, le=180),
+    max_lat: float = Query(ge=-90, le=90),
+    max_lon: float = Query(ge=-180, le=180),
+    limit: int = Query(1000, gt=0, le=50000),
+    db: DBSession = Depends(database_service.get_read_db),
+):
+    # min_lon > max_lon se interpreta como una ventana que cruza el antimeridiano
+    if min_lat > max_lat:
+        raise HTTPException(status_code=400, detail="min_lat must be less than or equal to max_lat")
+    points = await database_service.run(db, crud.get_pois_in_bbox, min_lat=min_lat, min_lon=min_lon, max_lat=max_lat, max_lon=max_lon, limit=limit)
+    return [point._asdict() for point in points]
+
+
+@router.get("/clusters", response_model=list[schemas.POICluster])
+async def read_poi_clusters(
+    bbox: str = Query(description="min_lon,min_lat,max_lon,max_lat"),
+    zoom: int = Query(ge=0, le=22),
+    db: DBSession = Depends(database_service.get_read_db),
+):
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat")
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise HTTPException(status_code=400, detail="bbox out of range")
+    clusters = await database_service.run(db, crud.get_poi_clusters, min_lat=min_lat, min_lon=min_lon, max_lat=max_lat, max_lon=max_lon, zoom=zoom)
+    return [cluster._asdict() for cluster in clusters]
+
+
+@router.get(
+    "/tiles/{z}/{x}/{y}",
+    response_class=Response,
+    responses={200: {"content": {TILE_MEDIA_TYPE: {}}, "description": "Tesela MessagePack con id, coordenadas, tipo y nombre de cada POI"}},
+)
+async def read_poi_tile(z: int = Path(ge=0, le=22), x: int = Path(ge=0), y: int = Path(ge=0), db: DBSession = Depends(database_service.get_read_db)):
+    if x >= 1 << z or y >= 1 << z:
+        raise HTTPException(status_code=400, detail="Tile out of range")
+    key = cache_service.list_key("poi_tiles", z=z, x=x, y=y)
+    cached = cache_service.get(key, media_type=TILE_MEDIA_TYPE)
+    if cached is not None:
+        return cached
+    points = await database_service.run(db, crud.get_poi_tile, zoom=z, x=x, y=y)
+    return cache_service.store(key, tile_service.encode(points), media_type=TILE_MEDIA_TYPE)
 
 
 @router.post("/createPois", response_model=schemas.POI)
-def create_poi(poi: schemas.POICreate, db: Session = Depends(database_service.get_db)):
-    return crud.create_poi(db=db, poi=poi)
+async def create_poi(poi: schemas.POICreate, db: DBSession = Depends(database_service.get_db)):
+    return await database_service.run(db, crud.create_poi, poi=poi)
+
+@router.post("/bulk", response_model=schemas.POIBulkResult, openapi_extra=bulk_openapi(schemas.POICreate))
+async def create_pois_bulk(pois: Annotated[list[Any], Body(max_length=schemas.BULK_MAX_ITEMS)], partial: bool = False, db: DBSession = Depends(database_service.get_db)):
+    # Con partial=true cada elemento se valida por separado y los inválidos se reportan en errors
+    _, valid, errors = validate_items(schemas.POICreate, pois, partial)
+    created = await database_service.run(db, crud.create_pois_bulk, valid)
+    return {"created": created, "errors": errors}
 
 @router.delete("/deletePoisById/{poi_id}")
-def delete_poi(poi_id: int, db: Session = Depends(database_service.get_db)):
-    crud.delete_poi(db=db, poi_id=poi_id)
+async def delete_poi(poi_id: int, db: DBSession = Depends(database_service.get_db)):
+    await database_service.run(db, crud.delete_poi, poi_id=poi_id)
     return {"message": "POI deleted"}
+
+@router.post("/bulkDelete", response_model=schemas.BulkDeleteResult)
+async def delete_pois_bulk(poi_ids: Annotated[list[int], Body(max_length=schemas.BULK_MAX_ITEMS)], db: DBSession = Depends(database_service.get_db)):
+    # Los POIs y toda su flora y fauna se eliminan en una sola transacción
+    deleted = await database_service.run(db, crud.delete_pois_bulk, poi_ids)
+    return {"deleted": deleted, "not_found": sorted(set(poi_ids) - set(deleted))}
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, Query
+from .. import crud, schemas
+from ..services.databaseService import DatabaseService, DBSession
+
+
+router = APIRouter(prefix="/search", tags=["Busqueda"])
+
+database_service = DatabaseService()
+
+@router.get("", response_model=list[schemas.SearchResult])
+async def search(
+    q: str = Query(min_length=2, max_length=100, description="Nombre común, científico o del POI"),
+    skip: int = Query(0, ge=0, le=1000),
+    limit: int = Query(10, gt=0, le=100),
+    db: DBSession = Depends(database_service.get_read_db),
+):
+    """
+    Busca en POIs, flora y fauna por prefijo o subcadena, sin distinguir tildes.
+    Los resultados se ordenan por coincidencia exacta, prefijo y subcadena.
+    """
+    return await database_service.run(db, crud.search_catalog, q=q, skip=skip, limit=limit)
@@ -1,58 +1,383 @@
-from sqlalchemy.orm import Session
+from collections import namedtuple
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy import case, delete, exists, func, insert, literal, null, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from . import  schemas
 from .models import models
+from .serialization import schema_columns
+from .services.cacheService import cache_service
+from .services.spatialIndexService import spatial_index
 
 
-def get_pois(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.POI).offset(skip).limit(limit).all()
+def _poi_children_options(include_children: bool):
+    # selectin carga flora y fauna de toda la pagina en una consulta por relacion,
+    # sin hijos (POISimple) no se tocan las tablas hijas: raiseload hace fallar
+    # cualquier acceso accidental en lugar de lanzar una consulta perezosa
+    if include_children:
+        return (selectinload(models.POI.flora), selectinload(models.POI.fauna))
+    return (raiseload(models.POI.flora), raiseload(models.POI.fauna))
 
-def get_poi_by_id(db: Session, poi_id: int):
-    return db.query(models.POI).filter(models.POI.id == poi_id).first()
+def _paginate(query, column, skip: int, limit: int, after_id: Optional[int]):
+    # Con after_id la página se busca por rango sobre la clave primaria (keyset),
+    # asi la página N cuesta lo mismo que la primera; skip queda para compatibilidad
+    query = query.order_by(column)
+    if after_id is not None:
+        return query.filter(column > after_id).limit(limit)
+    return query.offset(skip).limit(limit)
+
+def _filter_by(query, model, **filters):
+    # Igualdad sobre las columnas enviadas; cada combinación de filtros de los
+    # endpoints tiene un índice compuesto terminado en id (app/models/models.py)
+    for name, value in filters.items():
+        if value is not None:
+            query = query.filter(getattr(model, name) == value)
+    return query
+
+# Tablas hijas de un POI: campo del esquema -> (modelo, esquema de respuesta)
+POI_CHILDREN = {"flora": (models.Flora, schemas.Flora), "fauna": (models.Fauna, schemas.Fauna)}
+
+@lru_cache(maxsize=None)
+def _poi_row_type(fields: tuple):
+    # Fila de POI con sus hijos, en el orden de los campos del esquema
+    return namedtuple("POIRow", fields)
+
+def _group_by_poi(db: Session, model, schema, poi_ids: list) -> dict:
+    rows = db.execute(
+        select(*schema_columns(model, schema)).where(model.poi_id.in_(poi_ids)).order_by(model.id)
+    )
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row.poi_id, []).append(row)
+    return grouped
+
+def _poi_rows(db: Session, page_filter, fields: list[str]):
+    """
+    POIs elegidos por `page_filter` como filas de columnas (no objetos ORM) con los
+    `fields` de schemas.POI, para la ruta rápida de app/serialization.py. La flora y
+    fauna pedidas se leen para todas las filas con una consulta por tabla.
+    """
+    query = db.query(*schema_columns(models.POI, schemas.POISimple, fields))
+    pois = page_filter(query).all()
+    children = [name for name in POI_CHILDREN if name in fields]
+    if not children or not pois:
+        return pois
+    poi_ids = [poi.id for poi in pois]
+    grouped = [_group_by_poi(db, *POI_CHILDREN[name], poi_ids) for name in children]
+    row_type = _poi_row_type(tuple(pois[0]._fields) + tuple(children))
+    return [row_type(*poi, *(rows.get(poi.id, []) for rows in grouped)) for poi in pois]
+
+def get_pois(db: Session, skip: int = 0, limit: int = 10, include_children: bool = True, after_id: Optional[int] = None, fields: Optional[list[str]] = None, tipo: Optional[str] = None):
+    if fields is None:
+        fields = list((schemas.POI if include_children else schemas.POISimple).model_fields)
+    return _poi_rows(
+        db,
+        lambda query: _paginate(_filter_by(query, models.POI, tipo=tipo), models.POI.id, skip, limit, after_id),
+        fields,
+    )
+
+def _poi_summaries(db: Session, page_filter):
+    """
+    POIs elegidos por `page_filter` con la cantidad de flora y fauna de cada uno, en
+    una sola sentencia: la página va en un CTE y cada tabla hija se agrupa por poi_id
+    solo para los ids de la página, sin leer sus filas.
+    """
+    page = page_filter(select(*schema_columns(models.POI, schemas.POISimple))).cte("pagina")
+    statement = select(page)
+    for model, label in ((models.Flora, "cantidad_flora"), (models.Fauna, "cantidad_fauna")):
+        counts = (
+            select(model.poi_id, func.count().label("cantidad"))
+            .where(model.poi_id.in_(select(page.c.id)))
+            .group_by(model.poi_id)
+            .subquery()
+        )
+        statement = statement.add_columns(func.coalesce(counts.c.cantidad, 0).label(label))
+        statement = statement.outerjoin(counts, counts.c.poi_id == page.c.id)
+    return db.execute(statement.order_by(page.c.id)).all()
+
+def get_poi_summaries(db: Session, skip: int = 0, limit: int = 10, after_id: Optional[int] = None):
+    return _poi_summaries(db, lambda query: _paginate(query, models.POI.id, skip, limit, after_id))
+
+def get_poi_summary(db: Session, poi_id: int):
+    rows = _poi_summaries(db, lambda query: query.filter(models.POI.id == poi_id))
+    return rows[0] if rows else None
+
+def get_poi_by_id(db: Session, poi_id: int, include_children: bool = True, fields: Optional[list[str]] = None):
+    """
+    Objeto ORM del POI o, con `fields`, una fila con solo esas columnas (y los hijos pedidos).
+    """
+    if fields is not None:
+        rows = _poi_rows(db, lambda query: query.filter(models.POI.id == poi_id), fields)
+        return rows[0] if rows else None
+    return (
+        db.query(models.POI)
+        .options(*_poi_children_options(include_children))
+        .filter(models.POI.id == poi_id)
+        .first()
+    )
 
 def create_poi(db: Session, poi: schemas.POICreate):
     db_poi = models.POI(**poi.model_dump())
     db.add(db_poi)
     db.commit()
     db.refresh(db_poi)
+    # Un POI nuevo no tiene hijos: se marcan como cargados para que serializarlo
+    # no lance consultas perezosas (imposibles fuera de contexto con AsyncSession)
+    set_committed_value(db_poi, "flora", [])
+    set_committed_value(db_poi, "fauna", [])
+    spatial_index.add(db_poi)
+    cache_service.invalidate("poi", db_poi.id)
+    cache_service.invalidate("poi_tiles")
     return db_poi
 
 def delete_poi(db: Session, poi_id: int):
-    db.query(models.POI).filter(models.POI.id == poi_id).delete()
+    return bool(delete_pois_bulk(db, [poi_id]))
+
+def delete_pois_bulk(db: Session, poi_ids) -> list[int]:
+    """
+    Elimina los POIs y su flora y fauna con tres DELETE por conjunto en una sola
+    transacción. Devuelve los ids de POI eliminados (los inexistentes se ignoran).
+    """
+    poi_ids = list(set(poi_ids))
+    if not poi_ids:
+        return []
+    # Primero los hijos: en Postgres la FK impide borrar un POI con flora o fauna
+    children = {
+        namespace: db.execute(
+            delete(model).where(model.poi_id.in_(poi_ids)).returning(model.id)
+        ).scalars().all()
+        for namespace, (model, _) in POI_CHILDREN.items()
+    }
+    deleted = db.execute(
+        delete(models.POI).where(models.POI.id.in_(poi_ids)).returning(models.POI.id)
+    ).scalars().all()
     db.commit()
+    for namespace, child_ids in children.items():
+        if child_ids:
+            cache_service.invalidate(namespace, *child_ids)
+    if deleted:
+        for poi_id in deleted:
+            spatial_index.remove(poi_id)
+        cache_service.invalidate("poi", *deleted)
+        cache_service.invalidate("poi_tiles")
+    return sorted(deleted)
+
+def _bulk_insert(db: Session, model, rows: list[dict]):
+    # Un solo INSERT multi-fila con RETURNING; se devuelven filas (no objetos ORM)
+    # para que leerlas despues del commit no dispare un SELECT por fila
+    if not rows:
+        return []
+    # El orden de RETURNING en un INSERT por lotes no está garantizado:
+    # sort_by_parameter_order devuelve las filas en el orden de `rows`
+    columns = [column for column in model.__table__.columns]
+    result = db.execute(insert(model).returning(*columns, sort_by_parameter_order=True), rows)
+    return [row._asdict() for row in result]
+
+def _insert_for_poi(db: Session, model, schema, values: dict):
+    """
+    INSERT ... SELECT ... WHERE EXISTS (POI) RETURNING: valida el POI (también en
+    SQLite, que no aplica la FK) y devuelve la fila creada en un solo viaje, sin la
+    consulta previa del POI ni el SELECT de refresh(). None si el POI no existe.
+    """
+    values = {**values, **models.search_values(model, values)}
+    columns = model.__table__.columns
+    source = select(
+        *(literal(value, type_=columns[name].type).label(name) for name, value in values.items())
+    ).where(exists().where(models.POI.id == values["poi_id"]))
+    statement = insert(model).from_select(list(values), source).returning(*schema_columns(model, schema))
+    try:
+        row = db.execute(statement).first()
+    except IntegrityError:
+        # El POI se eliminó entre la comprobación y el INSERT (FK de Postgres)
+        db.rollback()
+        return None
+    if row is not None:
+        db.commit()
+    return row
+
+def get_existing_poi_ids(db: Session, poi_ids) -> set:
+    """
+    Ids de POI que existen, validados en una sola consulta.
+    """
+    poi_ids = set(poi_ids)
+    if not poi_ids:
+        return set()
+    return set(db.scalars(select(models.POI.id).where(models.POI.id.in_(poi_ids))))
+
+def create_pois_bulk(db: Session, pois: list[schemas.POICreate]):
+    created = _bulk_insert(db, models.POI, [poi.model_dump() for poi in pois])
+    db.commit()
+    for row in created:
+        spatial_index.add(models.POI(**row))
+    cache_service.invalidate("poi", *(row["id"] for row in created))
+    cache_service.invalidate("poi_tiles")
+    return created
+
+def get_pois_nearby(db: Session, lat: float, lon: float, radius: float, limit: int = 100):
+    spatial_index.ensure_loaded(db)
+    return spatial_index.nearby(lat, lon, radius, limit=limit)
+
+def get_poi_clusters(db: Session, min_lat: float, min_lon: float, max_lat: float, max_lon: float, zoom: int):
+    spatial_index.ensure_loaded(db)
+    return spatial_index.clusters(min_lat, min_lon, max_lat, max_lon, zoom)
 
+def get_poi_tile(db: Session, zoom: int, x: int, y: int):
+    spatial_index.ensure_loaded(db)
+    return spatial_index.tile(zoom, x, y)
 
-def get_flora(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Flora).offset(skip).limit(limit).all()
+def get_pois_in_bbox(db: Session, min_lat: float, min_lon: float, max_lat: float, max_lon: float, limit: int = 1000):
+    spatial_index.ensure_loaded(db)
+    return spatial_index.bbox(min_lat, min_lon, max_lat, max_lon, limit=limit)
 
-def get_flora_by_id(db: Session, flora_id: int):
+
+def get_flora(db: Session, skip: int = 0, limit: int = 10, after_id: Optional[int] = None, fields: Optional[list[str]] = None, familia: Optional[str] = None, poi_id: Optional[int] = None):
+    query = _filter_by(db.query(*schema_columns(models.Flora, schemas.Flora, fields)), models.Flora, familia=familia, poi_id=poi_id)
+    return _paginate(query, models.Flora.id, skip, limit, after_id).all()
+
+def get_flora_by_id(db: Session, flora_id: int, fields: Optional[list[str]] = None):
+    if fields is not None:
+        # Solo las columnas pedidas
+        return db.query(*schema_columns(models.Flora, schemas.Flora, fields)).filter(models.Flora.id == flora_id).first()
     return db.query(models.Flora).filter(models.Flora.id == flora_id).first()
 
 
 def create_flora(db: Session, flora: schemas.FloraCreate):
-    db_flora = models.Flora(**flora.model_dump())
-    db.add(db_flora)
-    db.commit()
-    db.refresh(db_flora)
+    """
+    Crea la flora y la devuelve como fila, o None si el POI no existe.
+    """
+    db_flora = _insert_for_poi(db, models.Flora, schemas.Flora, flora.model_dump())
+    if db_flora is not None:
+        cache_service.invalidate("flora", db_flora.id)
+        cache_service.invalidate("poi", db_flora.poi_id)
     return db_flora
 
-def delete_flora(db: Session, flora_id: int):
-    db.query(models.Flora).filter(models.Flora.id == flora_id).delete()
+def create_flora_bulk(db: Session, flora_items: list[schemas.FloraCreate], partial: bool = False):
+    """
+    Inserta todos los elementos cuyo POI existe. Devuelve (creados, índices con POI inexistente);
+    sin `partial` no inserta nada si algún POI falta.
+    """
+    existing = get_existing_poi_ids(db, (item.poi_id for item in flora_items))
+    missing = [index for index, item in enumerate(flora_items) if item.poi_id not in existing]
+    if missing and not partial:
+        return [], missing
+    valid = [item.model_dump() for item in flora_items if item.poi_id in existing]
+    created = _bulk_insert(db, models.Flora, valid)
     db.commit()
+    cache_service.invalidate("flora", *(row["id"] for row in created))
+    cache_service.invalidate("poi", *{row["poi_id"] for row in created})
+    return created, missing
+
+def _delete_by_ids(db: Session, model, namespace: str, item_ids) -> list[int]:
+    """
+    DELETE por conjunto de ids; RETURNING indica a qué POIs pertenecían para
+    invalidar su detalle en el cache. Devuelve los ids eliminados.
+    """
+    item_ids = list(set(item_ids))
+    if not item_ids:
+        return []
+    rows = db.execute(
+        delete(model).where(model.id.in_(item_ids)).returning(model.id, model.poi_id)
+    ).all()
+    db.commit()
+    if rows:
+        cache_service.invalidate(namespace, *(row.id for row in rows))
+        cache_service.invalidate("poi", *{row.poi_id for row in rows if row.poi_id is not None})
+    return sorted(row.id for row in rows)
+
+def delete_flora(db: Session, flora_id: int):
+    return bool(_delete_by_ids(db, models.Flora, "flora", [flora_id]))
+
+def delete_flora_bulk(db: Session, flora_ids) -> list[int]:
+    return _delete_by_ids(db, models.Flora, "flora", flora_ids)
 
-def get_fauna(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Fauna).offset(skip).limit(limit).all()
+def get_fauna(db: Session, skip: int = 0, limit: int = 10, after_id: Optional[int] = None, fields: Optional[list[str]] = None, especie: Optional[str] = None, habitat: Optional[str] = None, poi_id: Optional[int] = None):
+    query = _filter_by(db.query(*schema_columns(models.Fauna, schemas.Fauna, fields)), models.Fauna, especie=especie, habitat=habitat, poi_id=poi_id)
+    return _paginate(query, models.Fauna.id, skip, limit, after_id).all()
 
-def get_fauna_by_id(db: Session, fauna_id: int):
+def get_fauna_by_id(db: Session, fauna_id: int, fields: Optional[list[str]] = None):
+    if fields is not None:
+        # Solo las columnas pedidas
+        return db.query(*schema_columns(models.Fauna, schemas.Fauna, fields)).filter(models.Fauna.id == fauna_id).first()
     return db.query(models.Fauna).filter(models.Fauna.id == fauna_id).first()
 
 
 def create_fauna(db: Session, fauna: schemas.FaunaCreate):
-    db_fauna = models.Fauna(**fauna.model_dump())
-    db.add(db_fauna)
-    db.commit()
-    db.refresh(db_fauna)
+    """
+    Crea la fauna y la devuelve como fila, o None si el POI no existe.
+    """
+    db_fauna = _insert_for_poi(db, models.Fauna, schemas.Fauna, fauna.model_dump())
+    if db_fauna is not None:
+        cache_service.invalidate("fauna", db_fauna.id)
+        cache_service.invalidate("poi", db_fauna.poi_id)
     return db_fauna
 
+def create_fauna_bulk(db: Session, fauna_items: list[schemas.FaunaCreate], partial: bool = False):
+    """
+    Inserta todos los elementos cuyo POI existe. Devuelve (creados, índices con POI inexistente);
+    sin `partial` no inserta nada si algún POI falta.
+    """
+    existing = get_existing_poi_ids(db, (item.poi_id for item in fauna_items))
+    missing = [index for index, item in enumerate(fauna_items) if item.poi_id not in existing]
+    if missing and not partial:
+        return [], missing
+    valid = [item.model_dump() for item in fauna_items if item.poi_id in existing]
+    created = _bulk_insert(db, models.Fauna, valid)
+    db.commit()
+    cache_service.invalidate("fauna", *(row["id"] for row in created))
+    cache_service.invalidate("poi", *{row["poi_id"] for row in created})
+    return created, missing
+
 def delete_fauna(db: Session, fauna_id: int):
-    db.query(models.Fauna).filter(models.Fauna.id == fauna_id).delete()
-    db.commit()
\ No newline at end of file
+    return bool(_delete_by_ids(db, models.Fauna, "fauna", [fauna_id]))
+
+def delete_fauna_bulk(db: Session, fauna_ids) -> list[int]:
+    return _delete_by_ids(db, models.Fauna, "fauna", fauna_ids)
+
+
+def _search_rank(term: str, *columns):
+    # 0: coincidencia exacta, 1: prefijo, 2: subcadena
+    return case(
+        (or_(*(column == term for column in columns)), 0),
+        (or_(*(column.startswith(term, autoescape=True) for column in columns)), 1),
+        else_=2,
+    )
+
+def _search_sources():
+    return (
+        ("poi", models.POI, models.POI.nombre, null(), null(), (models.POI.nombre_busqueda,)),
+        ("flora", models.Flora, models.Flora.nombre_comun, models.Flora.nombre_cientifico, models.Flora.poi_id,
+         (models.Flora.nombre_comun_busqueda, models.Flora.nombre_cientifico_busqueda)),
+        ("fauna", models.Fauna, models.Fauna.nombre_comun, models.Fauna.nombre_cientifico, models.Fauna.poi_id,
+         (models.Fauna.nombre_comun_busqueda, models.Fauna.nombre_cientifico_busqueda)),
+    )
+
+def search_catalog(db: Session, q: str, skip: int = 0, limit: int = 10):
+    """
+    Busca por nombre en POIs, flora y fauna sin distinguir tildes ni mayusculas.
+    Cada tabla devuelve solo sus mejores skip + limit filas (filtradas por el indice
+    trigram en Postgres) y se mezclan por (rank, nombre normalizado).
+    """
+    term = models.search_key(q)
+    window = skip + limit
+    results = []
+    for entidad, model, nombre, nombre_cientifico, poi_id, columns in _search_sources():
+        rank = _search_rank(term, *columns).label("rank")
+        query = (
+            select(
+                model.id,
+                nombre.label("nombre"),
+                nombre_cientifico.label("nombre_cientifico"),
+                model.foto_url,
+                poi_id.label("poi_id"),
+                rank,
+                columns[0].label("orden"),
+            )
+            .where(or_(*(column.contains(term, autoescape=True) for column in columns)))
+            .order_by(rank, columns[0], model.id)
+            .limit(window)
+        )
+        results += [{"entidad": entidad, **row._asdict()} for row in db.execute(query)]
+    results.sort(key=lambda row: (row["rank"], row["orden"] or "", row["entidad"], row["id"]))
+    return results[skip:window]
@@ -1,5 +1,8 @@
-import os,ssl
+import os,ssl,threading,time
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 
@@ -10,10 +13,203 @@ ssl_context = ssl.create_default_context()
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 #SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_TEST")
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL,connect_args={"ssl_context": ssl_context},)
+# Con DATABASE_ASYNC=true los endpoints usan el engine asincrono (asyncpg/aiosqlite);
+# si no, siguen usando el engine sincrono de pg8000 en el threadpool
+DATABASE_ASYNC = os.getenv("DATABASE_ASYNC", "false").lower() in ("1", "true", "yes")
+
+# Configuracion del pool. La base gestionada cierra las conexiones TLS inactivas:
+# pre_ping y recycle evitan entregar una conexion muerta (InterfaceError)
+POOL_OPTIONS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "300")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+}
+
+
+class PoolStats:
+    """
+    Contadores de un pool de conexiones: esperas por una conexion, timeouts y
+    latencia de apertura de conexiones nuevas.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.connects = 0
+        self.connect_seconds_total = 0.0
+        self.connect_seconds_max = 0.0
+        # Callbacks (segundos de espera) para atribuir la espera a la peticion en curso
+        self.wait_listeners = []
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        for listener in self.wait_listeners:
+            listener(seconds)
+
+    def record_connect(self, seconds: float):
+        with self._lock:
+            self.connects += 1
+            self.connect_seconds_total += seconds
+            self.connect_seconds_max = max(self.connect_seconds_max, seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_avg": self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+                "wait_seconds_max": self.wait_seconds_max,
+                "connects": self.connects,
+                "connect_seconds_avg": self.connect_seconds_total / self.connects if self.connects else 0.0,
+                "connect_seconds_max": self.connect_seconds_max,
+            }
+
+
+def instrumented_pool_class(base, stats: PoolStats):
+    """
+    Subclase del pool que mide cuanto espera cada checkout y cuanto tarda cada conexion nueva.
+    Se crea por engine para que las estadisticas sobrevivan a pool.recreate().
+    """
+    class InstrumentedPool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except PoolTimeoutError:
+                stats.record_wait(time.perf_counter() - start, timed_out=True)
+                raise
+            stats.record_wait(time.perf_counter() - start)
+            return connection
+
+        def _create_connection(self):
+            start = time.perf_counter()
+            connection = super()._create_connection()
+            stats.record_connect(time.perf_counter() - start)
+            return connection
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
+
+
+pool_stats = PoolStats()
+
+# El contexto TLS solo aplica a Postgres (pg8000); una URL sqlite local se conecta sin el
+connect_args = {"ssl_context": ssl_context} if make_url(SQLALCHEMY_DATABASE_URL).get_backend_name() == "postgresql" else {}
+
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args=connect_args,
+    poolclass=instrumented_pool_class(QueuePool, pool_stats),
+    **POOL_OPTIONS,
+)
 
 #engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Replicas de solo lectura (URLs separadas por comas). Los GET del catalogo leen de
+# ellas (ver DatabaseService.get_read_db) y las escrituras siguen en el primario
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+
+replica_pool_stats = [PoolStats() for _ in DATABASE_REPLICA_URLS]
+replica_engines = [
+    create_engine(
+        url,
+        connect_args={"ssl_context": ssl_context} if make_url(url).get_backend_name() == "postgresql" else {},
+        poolclass=instrumented_pool_class(QueuePool, stats),
+        **POOL_OPTIONS,
+    )
+    for url, stats in zip(DATABASE_REPLICA_URLS, replica_pool_stats)
+]
+ReplicaSessionLocals = [sessionmaker(autocommit=False, autoflush=False, bind=replica) for replica in replica_engines]
+
 Base = declarative_base()
+
+
+def async_database_url(url):
+    """
+    Traduce la URL sincrona al driver asincrono equivalente.
+    DATABASE_ASYNC_URL permite indicarla explicitamente.
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend == "postgresql":
+        return url.set(drivername="postgresql+asyncpg")
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url
+
+
+async_engine = None
+AsyncSessionLocal = None
+async_pool_stats = PoolStats()
+async_replica_engines = []
+async_replica_pool_stats = []
+AsyncReplicaSessionLocals = []
+
+if DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    ASYNC_DATABASE_URL = os.getenv("DATABASE_ASYNC_URL") or async_database_url(SQLALCHEMY_DATABASE_URL)
+    async_connect_args = {"ssl": ssl_context} if make_url(ASYNC_DATABASE_URL).get_backend_name() == "postgresql" else {}
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args=async_connect_args,
+        poolclass=instrumented_pool_class(AsyncAdaptedQueuePool, async_pool_stats),
+        **POOL_OPTIONS,
+    )
+    # expire_on_commit=False: los objetos se serializan despues del commit, fuera del contexto
+    # asincrono, y no pueden volver a la base de datos de forma implicita
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    async_replica_pool_stats = [PoolStats() for _ in DATABASE_REPLICA_URLS]
+    for url, stats in zip(DATABASE_REPLICA_URLS, async_replica_pool_stats):
+        url = async_database_url(url)
+        async_replica_engines.append(create_async_engine(
+            url,
+            connect_args={"ssl": ssl_context} if url.get_backend_name() == "postgresql" else {},
+            poolclass=instrumented_pool_class(AsyncAdaptedQueuePool, stats),
+            **POOL_OPTIONS,
+        ))
+    AsyncReplicaSessionLocals = [
+        async_sessionmaker(bind=replica, autoflush=False, expire_on_commit=False) for replica in async_replica_engines
+    ]
+
+
+def _pool_status(pool, stats: PoolStats) -> dict:
+    status = {"class": type(pool).__name__, **stats.snapshot()}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "timeout": pool.timeout(),
+        })
+    return status
+
+
+def pool_status() -> dict:
+    """
+    Estado y estadisticas de los pools de conexiones activos.
+    """
+    status = {"sync": _pool_status(engine.pool, pool_stats)}
+    if async_engine is not None:
+        status["async"] = _pool_status(async_engine.pool, async_pool_stats)
+    for index, (replica, stats) in enumerate(zip(replica_engines, replica_pool_stats)):
+        status[f"replica_{index}"] = _pool_status(replica.pool, stats)
+    for index, (replica, stats) in enumerate(zip(async_replica_engines, async_replica_pool_stats)):
+        status[f"async_replica_{index}"] = _pool_status(replica.pool, stats)
+    return status
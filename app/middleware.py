@@ -0,0 +1,45 @@
+from starlette.datastructures import MutableHeaders
+from .services.metricsService import current_request, metrics_service
+
+# Etiqueta para las peticiones que no coinciden con ninguna ruta (evita una serie por URL)
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mide cada petición: latencia por ruta, consultas SQL y tiempo
+    por fase. Añade la cabecera Server-Timing al iniciar la respuesta.
+
+    Es ASGI puro (no BaseHTTPMiddleware) para no envolver el cuerpo de las respuestas
+    en streaming ni crear una tarea extra por petición.
+    """
+
+    def __init__(self, app, service=metrics_service):
+        self.app = app
+        self.service = service
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request = self.service.start_request()
+        token = current_request.set(request)
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", request.server_timing())
+                headers.append("Timing-Allow-Origin", "*")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            self.service.finish_request(scope["method"], path, status, request)
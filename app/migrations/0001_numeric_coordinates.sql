@@ -0,0 +1,17 @@
+-- Convierte las coordenadas de los POIs de texto a double precision.
+-- Los valores que no son numericos (vacios, texto libre) quedan en NULL;
+-- se acepta la coma como separador decimal.
+ALTER TABLE puntos_de_interes
+    ALTER COLUMN longitud TYPE double precision
+        USING CASE
+            WHEN replace(trim(longitud), ',', '.') ~ '^[-+]?[0-9]*\.?[0-9]+([eE][-+]?[0-9]+)?$'
+            THEN replace(trim(longitud), ',', '.')::double precision
+        END,
+    ALTER COLUMN latitud TYPE double precision
+        USING CASE
+            WHEN replace(trim(latitud), ',', '.') ~ '^[-+]?[0-9]*\.?[0-9]+([eE][-+]?[0-9]+)?$'
+            THEN replace(trim(latitud), ',', '.')::double precision
+        END;
+
+CREATE INDEX IF NOT EXISTS ix_puntos_de_interes_latitud_longitud
+    ON puntos_de_interes (latitud, longitud);
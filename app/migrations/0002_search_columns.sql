@@ -0,0 +1,22 @@
+-- Columnas normalizadas (minusculas, sin tildes) para la busqueda por nombre,
+-- con indices trigram que sirven tanto para prefijos como para subcadenas.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE puntos_de_interes ADD COLUMN IF NOT EXISTS nombre_busqueda varchar;
+ALTER TABLE flora ADD COLUMN IF NOT EXISTS nombre_cientifico_busqueda varchar;
+ALTER TABLE flora ADD COLUMN IF NOT EXISTS nombre_comun_busqueda varchar;
+ALTER TABLE fauna ADD COLUMN IF NOT EXISTS nombre_cientifico_busqueda varchar;
+ALTER TABLE fauna ADD COLUMN IF NOT EXISTS nombre_comun_busqueda varchar;
+
+-- Los valores se calculan después en Python con models.search_key (PYTHON_STEPS)
+
+CREATE INDEX IF NOT EXISTS ix_puntos_de_interes_nombre_busqueda
+    ON puntos_de_interes USING gin (nombre_busqueda gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_flora_nombre_cientifico_busqueda
+    ON flora USING gin (nombre_cientifico_busqueda gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_flora_nombre_comun_busqueda
+    ON flora USING gin (nombre_comun_busqueda gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_fauna_nombre_cientifico_busqueda
+    ON fauna USING gin (nombre_cientifico_busqueda gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_fauna_nombre_comun_busqueda
+    ON fauna USING gin (nombre_comun_busqueda gin_trgm_ops);
@@ -0,0 +1,10 @@
+-- Indices para los filtros de getAllPois (tipo), getAllFlora (familia, poi_id) y
+-- getAllFauna (especie, habitat, poi_id). Terminan en id para servir tambien el
+-- orden de la paginacion por clave. poi_id no tenia indice: tambien lo usan los
+-- resumenes por POI y el borrado en cascada.
+CREATE INDEX IF NOT EXISTS ix_puntos_de_interes_tipo_id ON puntos_de_interes (tipo, id);
+CREATE INDEX IF NOT EXISTS ix_flora_poi_id_id ON flora (poi_id, id);
+CREATE INDEX IF NOT EXISTS ix_flora_familia_poi_id_id ON flora (familia, poi_id, id);
+CREATE INDEX IF NOT EXISTS ix_fauna_poi_id_id ON fauna (poi_id, id);
+CREATE INDEX IF NOT EXISTS ix_fauna_especie_habitat_id ON fauna (especie, habitat, id);
+CREATE INDEX IF NOT EXISTS ix_fauna_habitat_id ON fauna (habitat, id);
@@ -0,0 +1,7 @@
+-- Un filtro por una sola columna con ORDER BY id (familia en getAllFlora, especie
+-- en getAllFauna) no puede usar el orden de (familia, poi_id, id) ni de
+-- (especie, habitat, id). Los indices (columna, id) sirven filtro y orden y hacen
+-- redundante el indice simple de especie.
+CREATE INDEX IF NOT EXISTS ix_flora_familia_id ON flora (familia, id);
+CREATE INDEX IF NOT EXISTS ix_fauna_especie_id ON fauna (especie, id);
+DROP INDEX IF EXISTS ix_fauna_especie;
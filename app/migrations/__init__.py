@@ -0,0 +1,159 @@
+"""
+Migraciones versionadas del esquema.
+
+Cada archivo NNNN_descripcion.sql de esta carpeta es una migración para Postgres;
+la tabla schema_version guarda cuáles se aplicaron. Una versión puede tener además
+un paso Python (PYTHON_STEPS) que se ejecuta después de su SQL, en la misma transacción. En una base vacía el esquema se
+crea desde los modelos y se marca en la última versión, así los archivos solo se
+ejecutan sobre bases creadas antes de ellos.
+
+    python -m app.migrations upgrade   # aplica las pendientes (paso de despliegue)
+    python -m app.migrations check     # versión actual y pendientes
+    python -m app.migrations stamp 2   # marca como aplicadas hasta la 2 sin ejecutarlas
+"""
+import os
+import re
+from sqlalchemy import bindparam, inspect, select, text
+from sqlalchemy.engine import Engine
+
+MIGRATIONS_DIR = os.path.dirname(os.path.abspath(__file__))
+MIGRATION_FILE = re.compile(r"^(\d{4})_[\w-]+\.sql$")
+VERSION_TABLE = "schema_version"
+# Clave del advisory lock de Postgres que serializa migraciones concurrentes
+ADVISORY_LOCK_KEY = 4815162342
+
+
+# Filas por lote del recálculo de las columnas de búsqueda
+BACKFILL_BATCH_SIZE = 5000
+
+
+def backfill_search_columns(connection):
+    """
+    Recalcula las columnas <campo>_busqueda de POIs, flora y fauna con
+    models.search_key, por lotes de ids.
+    """
+    from ..models import models
+
+    for model in (models.POI, models.Flora, models.Fauna):
+        table = model.__table__
+        sources = [column.name for column in table.columns if f"{column.name}_busqueda" in table.columns]
+        statement = (
+            table.update()
+            .where(table.c.id == bindparam("b_id"))
+            .values({f"{name}_busqueda": bindparam(f"b_{name}") for name in sources})
+        )
+        last_id = 0
+        while True:
+            rows = connection.execute(
+                select(table.c.id, *(table.c[name] for name in sources))
+                .where(table.c.id > last_id).order_by(table.c.id).limit(BACKFILL_BATCH_SIZE)
+            ).all()
+            if not rows:
+                break
+            connection.execute(statement, [
+                {"b_id": row.id, **{f"b_{name}": models.search_key(getattr(row, name)) for name in sources}}
+                for row in rows
+            ])
+            last_id = rows[-1].id
+
+
+# Pasos Python que se ejecutan después del SQL de su versión
+PYTHON_STEPS = {2: backfill_search_columns}
+
+
+def available_migrations() -> list[tuple[int, str]]:
+    """
+    (versión, ruta) de los archivos de migración, en orden.
+    """
+    found = []
+    for name in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE.match(name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(MIGRATIONS_DIR, name)))
+    return sorted(found)
+
+
+def latest_version() -> int:
+    migrations = available_migrations()
+    return migrations[-1][0] if migrations else 0
+
+
+def split_statements(sql: str) -> list[str]:
+    """
+    Sentencias de un archivo: se separan por un `;` al final de la línea.
+    """
+    lines = [line for line in sql.splitlines() if not line.strip().startswith("--")]
+    statements = re.split(r";\s*$", "\n".join(lines), flags=re.MULTILINE)
+    return [statement.strip() for statement in statements if statement.strip()]
+
+
+def _ensure_version_table(connection):
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {VERSION_TABLE} ("
+        "version INTEGER PRIMARY KEY, "
+        "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    ))
+
+
+def current_version(connection) -> int:
+    if not inspect(connection).has_table(VERSION_TABLE):
+        return 0
+    return connection.execute(text(f"SELECT max(version) FROM {VERSION_TABLE}")).scalar() or 0
+
+
+def _stamp(connection, versions):
+    for version in versions:
+        connection.execute(text(f"INSERT INTO {VERSION_TABLE} (version) VALUES (:version)"), {"version": version})
+
+
+def check(engine: Engine) -> dict:
+    """
+    Comprobación barata para el arranque: una consulta sobre schema_version.
+    """
+    with engine.connect() as connection:
+        current = current_version(connection)
+    pending = [version for version, _ in available_migrations() if version > current]
+    return {"current": current, "latest": latest_version(), "pending": pending}
+
+
+def upgrade(engine: Engine) -> list[int]:
+    """
+    Lleva el esquema a la última versión. Devuelve las versiones aplicadas.
+    """
+    from ..database import Base
+    from ..models import models  # noqa: F401  registra las tablas en Base.metadata
+
+    is_postgres = engine.dialect.name == "postgresql"
+    with engine.begin() as connection:
+        if is_postgres:
+            connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        fresh = not inspect(connection).has_table(models.POI.__tablename__)
+        _ensure_version_table(connection)
+        current = current_version(connection)
+        pending = [(version, path) for version, path in available_migrations() if version > current]
+
+        if fresh or not is_postgres:
+            # Base nueva (o SQLite de desarrollo): el esquema sale completo de los modelos
+            Base.metadata.create_all(bind=connection)
+            _stamp(connection, [version for version, _ in pending])
+            return [version for version, _ in pending]
+
+        for version, path in pending:
+            with open(path, encoding="utf-8") as f:
+                for statement in split_statements(f.read()):
+                    connection.exec_driver_sql(statement)
+            if version in PYTHON_STEPS:
+                PYTHON_STEPS[version](connection)
+            _stamp(connection, [version])
+        return [version for version, _ in pending]
+
+
+def stamp(engine: Engine, version: int):
+    """
+    Marca como aplicadas las migraciones hasta `version` sin ejecutarlas
+    (bases a las que ya se les aplicaron a mano).
+    """
+    with engine.begin() as connection:
+        _ensure_version_table(connection)
+        current = current_version(connection)
+        _stamp(connection, [v for v, _ in available_migrations() if current < v <= version])
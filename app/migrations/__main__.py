@@ -0,0 +1,28 @@
+import argparse
+import sys
+from . import check, stamp, upgrade
+from ..database import engine
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.migrations", description="Migraciones del esquema")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("upgrade", help="Aplica las migraciones pendientes")
+    commands.add_parser("check", help="Muestra la versión actual y las pendientes; código 1 si hay pendientes")
+    stamp_parser = commands.add_parser("stamp", help="Marca como aplicadas hasta VERSION sin ejecutarlas")
+    stamp_parser.add_argument("version", type=int)
+    args = parser.parse_args(argv)
+
+    if args.command == "upgrade":
+        applied = upgrade(engine)
+        print(f"Migraciones aplicadas: {applied}" if applied else "El esquema ya está al día")
+    elif args.command == "stamp":
+        stamp(engine, args.version)
+        print(f"Esquema marcado en la versión {args.version}")
+    status = check(engine)
+    print(f"Versión actual {status['current']}, última {status['latest']}, pendientes {status['pending']}")
+    return 1 if args.command == "check" and status["pending"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,44 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+import unicodedata
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, Index, DDL, event
 from sqlalchemy.orm import relationship
 from ..database import Base
 
+
+def search_key(text):
+    """
+    Forma normalizada para busqueda: minusculas, sin tildes y con espacios simples.
+    """
+    if text is None:
+        return None
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.lower().split())
+
+def search_values(model, values: dict) -> dict:
+    """
+    Columnas <campo>_busqueda de `model` calculadas desde `values`. Hacen falta en
+    INSERT ... SELECT, donde los defaults de Python no reciben los valores de la fila.
+    """
+    columns = model.__table__.columns
+    return {f"{name}_busqueda": search_key(value) for name, value in values.items() if f"{name}_busqueda" in columns}
+
+def _search_default(source: str):
+    # Se calcula al insertar, tambien en los INSERT multi-fila de los endpoints bulk
+    def default(context):
+        return search_key(context.get_current_parameters().get(source))
+    return default
+
+def _trigram_index(name: str, column: str):
+    # GIN trigram en Postgres acelera LIKE 'q%' y LIKE '%q%'; en SQLite queda como indice normal
+    return Index(name, column, postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"})
+
+# Los indices trigram necesitan la extension pg_trgm antes de crear las tablas
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
 class POI(Base):
     __tablename__ = "puntos_de_interes"
 
@@ -10,12 +47,21 @@ class POI(Base):
     descripcion = Column(String)
     foto_url = Column(String)
     tipo = Column(String)
-    longitud = Column(String)
-    latitud = Column(String)
+    longitud = Column(Float)
+    latitud = Column(Float)
+    nombre_busqueda = Column(String, default=_search_default("nombre"))
 
     flora = relationship("Flora", back_populates="poi")
     fauna = relationship("Fauna", back_populates="poi")
 
+    # Los indices de filtro terminan en id: el filtro y el orden de la paginacion
+    # por clave (WHERE ... AND id > cursor ORDER BY id) se resuelven con el mismo indice
+    __table_args__ = (
+        Index("ix_puntos_de_interes_latitud_longitud", "latitud", "longitud"),
+        Index("ix_puntos_de_interes_tipo_id", "tipo", "id"),
+        _trigram_index("ix_puntos_de_interes_nombre_busqueda", "nombre_busqueda"),
+    )
+
 class Flora(Base):
     __tablename__ = "flora"
 
@@ -25,18 +71,39 @@ class Flora(Base):
     familia = Column(String)
     foto_url = Column(String)
     poi_id = Column(Integer, ForeignKey('puntos_de_interes.id'))
+    nombre_cientifico_busqueda = Column(String, default=_search_default("nombre_cientifico"))
+    nombre_comun_busqueda = Column(String, default=_search_default("nombre_comun"))
 
     poi = relationship("POI", back_populates="flora")
 
+    __table_args__ = (
+        Index("ix_flora_poi_id_id", "poi_id", "id"),
+        Index("ix_flora_familia_poi_id_id", "familia", "poi_id", "id"),
+        Index("ix_flora_familia_id", "familia", "id"),
+        _trigram_index("ix_flora_nombre_cientifico_busqueda", "nombre_cientifico_busqueda"),
+        _trigram_index("ix_flora_nombre_comun_busqueda", "nombre_comun_busqueda"),
+    )
+
 class Fauna(Base):
     __tablename__ = "fauna"
 
     id = Column(Integer, primary_key=True, index=True)
     nombre_cientifico = Column(String, index=True)
     nombre_comun = Column(String)
-    especie = Column(String, index=True)
+    especie = Column(String)
     habitat = Column(String)
     foto_url = Column(String)
     poi_id = Column(Integer, ForeignKey('puntos_de_interes.id'))
+    nombre_cientifico_busqueda = Column(String, default=_search_default("nombre_cientifico"))
+    nombre_comun_busqueda = Column(String, default=_search_default("nombre_comun"))
 
     poi = relationship("POI", back_populates="fauna")
+
+    __table_args__ = (
+        Index("ix_fauna_poi_id_id", "poi_id", "id"),
+        Index("ix_fauna_especie_id", "especie", "id"),
+        Index("ix_fauna_especie_habitat_id", "especie", "habitat", "id"),
+        Index("ix_fauna_habitat_id", "habitat", "id"),
+        _trigram_index("ix_fauna_nombre_cientifico_busqueda", "nombre_cientifico_busqueda"),
+        _trigram_index("ix_fauna_nombre_comun_busqueda", "nombre_comun_busqueda"),
+    )
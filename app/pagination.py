@@ -0,0 +1,40 @@
+import base64
+import json
+from typing import Optional
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Cursor opaco para paginación por clave (keyset) sobre la columna id.
+    """
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    """
+    Devuelve el último id visto o None si no se envió cursor.
+    Un cursor mal formado se responde con 400.
+    """
+    if cursor is None:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))["id"]
+        if not isinstance(last_id, int):
+            raise ValueError
+        return last_id
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def next_cursor_headers(items, limit: int) -> dict:
+    """
+    Cabecera X-Next-Cursor con el cursor de la página siguiente cuando la página vino completa.
+    """
+    if limit > 0 and len(items) == limit:
+        return {NEXT_CURSOR_HEADER: encode_cursor(items[-1].id)}
+    return {}
@@ -1,5 +1,14 @@
-from typing import List, Optional
-from pydantic import BaseModel
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, computed_field
+from .services.imageService import variant_urls
+
+# Response mixin for schemas with foto_url: URLs of its WebP derivatives
+class FotoVariantes(BaseModel):
+    @computed_field
+    @property
+    def foto_variantes(self) -> Optional[Dict[str, str]]:
+        # None for external links and uploads without derivatives
+        return variant_urls(self.foto_url)
 
 # Flora schemas
 class FloraBase(BaseModel):
@@ -12,7 +21,7 @@ class FloraBase(BaseModel):
 class FloraCreate(FloraBase):
     pass
 
-class Flora(FloraBase):
+class Flora(FloraBase, FotoVariantes):
     id: int
     
     class Config:
@@ -30,7 +39,7 @@ class FaunaBase(BaseModel):
 class FaunaCreate(FaunaBase):
     pass
 
-class Fauna(FaunaBase):
+class Fauna(FaunaBase, FotoVariantes):
     id: int
     
     class Config:
@@ -42,17 +51,79 @@ class POIBase(BaseModel):
     descripcion: str
     foto_url: str
     tipo: str
-    longitud: str
-    latitud: str
+    # Las filas migradas desde texto sin coordenadas validas quedan en NULL
+    longitud: Optional[float] = None
+    latitud: Optional[float] = None
 
 class POICreate(POIBase):
-    pass
+    longitud: float = Field(ge=-180, le=180)
+    latitud: float = Field(ge=-90, le=90)
 
-# POI response schema with relationships
-class POI(POIBase):
+# POI response schema without relationships
+class POISimple(POIBase, FotoVariantes):
     id: int
-    flora: List[Flora] = []
-    fauna: List[Fauna] = []
-    
+
     class Config:
         from_attributes = True
+
+# POI response schema with relationships
+class POI(POISimple):
+    flora: List[Flora] = []
+    fauna: List[Fauna] = []
+
+# POI response schema with the number of species instead of the lists
+class POISummary(POISimple):
+    cantidad_flora: int
+    cantidad_fauna: int
+
+# POI schemas for map queries served from the spatial index
+class POILocation(BaseModel):
+    id: int
+    nombre: str
+    tipo: str
+    longitud: float
+    latitud: float
+
+class POINearby(POILocation):
+    distancia: float
+
+class POICluster(BaseModel):
+    # Centroide de los POIs agrupados en la celda
+    latitud: float
+    longitud: float
+    cantidad: int
+    # Solo cuando el cluster es un único POI
+    id: Optional[int] = None
+
+# Bulk create schemas
+BULK_MAX_ITEMS = 5000
+
+class BulkError(BaseModel):
+    index: int
+    detail: str
+
+class POIBulkResult(BaseModel):
+    created: List[POISimple] = []
+    errors: List[BulkError] = []
+
+class FloraBulkResult(BaseModel):
+    created: List[Flora] = []
+    errors: List[BulkError] = []
+
+class FaunaBulkResult(BaseModel):
+    created: List[Fauna] = []
+    errors: List[BulkError] = []
+
+class BulkDeleteResult(BaseModel):
+    deleted: List[int] = []
+    not_found: List[int] = []
+
+# Search schemas
+class SearchResult(BaseModel):
+    entidad: str
+    id: int
+    nombre: str
+    nombre_cientifico: Optional[str] = None
+    foto_url: Optional[str] = None
+    poi_id: Optional[int] = None
+    rank: int
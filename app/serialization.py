@@ -0,0 +1,92 @@
+from typing import Optional
+import orjson
+from fastapi import HTTPException
+from .services.metricsService import metrics_service
+
+# Columnas que necesita cada campo calculado de los esquemas de respuesta
+COMPUTED_DEPENDENCIES = {"foto_variantes": ("foto_url",)}
+
+FIELDS_DESCRIPTION = "Campos de la respuesta separados por comas, p. ej. id,nombre_comun,foto_url (id se incluye siempre)"
+
+
+def schema_columns(model, schema, fields: Optional[list[str]] = None) -> list:
+    """
+    Columnas de `model` que publica el esquema de respuesta, en el orden del esquema.
+    Con `fields` solo las de esos campos.
+    """
+    columns = model.__table__.columns
+    return [
+        columns[name] for name in schema.model_fields
+        if name in columns and (fields is None or name in fields)
+    ]
+
+
+def parse_fields(fields: Optional[str], schema) -> Optional[list[str]]:
+    """
+    Campos pedidos en `fields=a,b,c`, validados contra el esquema de respuesta.
+    None si no se envió el parámetro; un campo desconocido se responde con 400.
+    """
+    if fields is None:
+        return None
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    allowed = set(schema.model_fields) | set(schema.model_computed_fields)
+    unknown = [name for name in requested if name not in allowed]
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}" if unknown else "fields must not be empty",
+        )
+    return requested
+
+
+class _Item(dict):
+    # Los campos calculados del esquema leen atributos (self.foto_url); orjson
+    # serializa las subclases de dict como un dict normal
+    __getattr__ = dict.__getitem__
+
+
+class RowSerializer:
+    """
+    Serializa filas de columnas con la forma de un esquema de respuesta y las
+    codifica con orjson.
+
+    Es la ruta rápida de las listas: no valida cada objeto con Pydantic (los tipos ya
+    los garantizan las columnas) y los controladores responden con estos bytes; el
+    response_model de esos endpoints solo documenta la forma de la respuesta en OpenAPI. Cada fila es una tupla (Row de SQLAlchemy) con los
+    valores de `self.fields` en ese orden, como la que devuelve un SELECT de
+    `schema_columns(model, schema, serializer.fields)`; los campos hijos, si los hay,
+    son listas de filas. Los campos calculados (foto_variantes) se evalúan con la
+    misma función del esquema, así el JSON coincide con el del response_model.
+
+    Con `fields` la respuesta se limita a esos campos más `id`; `self.fields` incluye
+    además las columnas que necesitan los campos calculados pedidos.
+    """
+
+    def __init__(self, schema, fields: Optional[list[str]] = None, **children: "RowSerializer"):
+        computed = schema.model_computed_fields
+        requested = set(schema.model_fields) | set(computed) if fields is None else {"id", *fields}
+        needed = set(requested)
+        for name in requested & set(computed):
+            needed.update(COMPUTED_DEPENDENCIES.get(name, ()))
+        self.fields = [name for name in schema.model_fields if name in needed]
+        self.children = [(name, child) for name, child in children.items() if name in needed]
+        self.computed = [(name, info.wrapped_property.fget) for name, info in computed.items() if name in requested]
+        self.hidden = [name for name in self.fields if name not in requested]
+
+    def to_dict(self, row) -> dict:
+        item = _Item(zip(self.fields, row))
+        for name, child in self.children:
+            item[name] = [child.to_dict(value) for value in item[name]]
+        for name, function in self.computed:
+            item[name] = function(item)
+        for name in self.hidden:
+            del item[name]
+        return item
+
+    def dump_json(self, rows) -> bytes:
+        with metrics_service.phase("serialize"):
+            return orjson.dumps([self.to_dict(row) for row in rows])
+
+    def dump_item(self, row) -> bytes:
+        with metrics_service.phase("serialize"):
+            return orjson.dumps(self.to_dict(row))
@@ -0,0 +1,250 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from fastapi import Response
+from pydantic import TypeAdapter
+from .metricsService import metrics_service
+
+
+class CacheBackend:
+    """
+    Interfaz de almacenamiento del cache. Los valores son bytes ya serializados.
+    """
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: float):
+        raise NotImplementedError
+
+    def incr(self, key: str) -> int:
+        """
+        Incrementa un contador que nunca expira (generación de un namespace o elemento).
+        """
+        raise NotImplementedError
+
+    def get_counter(self, key: str) -> int:
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    LRU en memoria del proceso con TTL por entrada y tamaño máximo.
+
+    Los contadores de generación también están acotados a `max_entries` (LRU). Sus
+    valores salen de una secuencia única del proceso y un contador expulsado sube el
+    piso (`_floor`) que devuelve get_counter para las claves sin contador: así las
+    entradas de generaciones anteriores nunca vuelven a ser alcanzables.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._counters: OrderedDict[str, int] = OrderedDict()
+        self._sequence = 0
+        self._floor = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._sequence += 1
+            self._counters[key] = self._sequence
+            self._counters.move_to_end(key)
+            while len(self._counters) > self.max_entries:
+                _, generation = self._counters.popitem(last=False)
+                self._floor = max(self._floor, generation)
+            return self._sequence
+
+    def get_counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, self._floor)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+            self._sequence = self._floor = 0
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "counters": len(self._counters),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend compartido entre workers. Requiere el paquete `redis`.
+    """
+
+    def __init__(self, url: str, prefix: str = "botanicmap:"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.client.set(self.prefix + key, value, px=int(ttl * 1000))
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(self.prefix + key)
+
+    def get_counter(self, key: str) -> int:
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def stats(self) -> dict:
+        return {"backend": "redis"}
+
+
+class CacheService:
+    """
+    Cache de respuestas de lectura del catálogo.
+
+    Guarda el JSON ya serializado, así un acierto evita tanto la base de datos como
+    Pydantic. Cada clave incluye un contador de generación: el del namespace para las
+    listas y el del elemento para el detalle. Los create/delete de app/crud.py
+    incrementan exactamente los contadores afectados.
+
+    Con réplicas de lectura, `replica_lag_seconds` es el retraso de replicación
+    admitido: durante ese tiempo tras invalidar un contador sus claves valen None y
+    la respuesta no se cachea, para no guardar lo que devuelva una réplica retrasada.
+    La marca vive en el backend, así con Redis la ven todos los workers.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend], ttl: float = 60.0):
+        self.backend = backend
+        self.ttl = ttl
+        self.replica_lag_seconds = 0.0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _key(self, counter: str, prefix: str, params: dict) -> Optional[str]:
+        if self.enabled and self.replica_lag_seconds and self.backend.get(f"recent:{counter}") is not None:
+            return None
+        generation = self.backend.get_counter(counter) if self.enabled else 0
+        suffix = "".join(f":{name}={params[name]}" for name in sorted(params))
+        return f"{prefix}:{generation}{suffix}"
+
+    def detail_key(self, namespace: str, item_id: int, **params) -> Optional[str]:
+        return self._key(f"gen:{namespace}:{item_id}", f"{namespace}:{item_id}", params)
+
+    def list_key(self, namespace: str, **params) -> Optional[str]:
+        return self._key(f"gen:{namespace}", f"{namespace}:list", params)
+
+    def get(self, key: Optional[str], media_type: str = "application/json") -> Optional[Response]:
+        """
+        Respuesta cacheada o None.
+        """
+        if not self.enabled or key is None:
+            return None
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        headers, body = value.split(b"\n", 1)
+        return Response(content=body, media_type=media_type, headers=json.loads(headers))
+
+    def response(self, key: Optional[str], adapter: TypeAdapter, value, headers: Optional[dict] = None) -> Response:
+        """
+        Serializa `value` con el TypeAdapter del response_model, lo guarda y lo devuelve.
+        """
+        with metrics_service.phase("serialize"):
+            body = adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+        return self.store(key, body, headers=headers)
+
+    def store(self, key: Optional[str], body: bytes, media_type: str = "application/json", headers: Optional[dict] = None) -> Response:
+        """
+        Guarda un cuerpo ya serializado (JSON o binario) y lo devuelve como respuesta.
+        Con key None solo lo devuelve.
+        """
+        headers = dict(headers or {})
+        if self.enabled and key is not None:
+            self.backend.set(key, json.dumps(headers).encode() + b"\n" + body, self.ttl)
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    def invalidate(self, namespace: str, *item_ids: int):
+        """
+        Invalida las listas de `namespace` y todas las variantes de detalle de los ids indicados.
+        Las entradas viejas ya no son alcanzables y salen por LRU o TTL.
+        """
+        if not self.enabled:
+            return
+        counters = [f"gen:{namespace}", *(f"gen:{namespace}:{item_id}" for item_id in item_ids)]
+        for counter in counters:
+            self.backend.incr(counter)
+            if self.replica_lag_seconds:
+                self.backend.set(f"recent:{counter}", b"1", self.replica_lag_seconds)
+
+    def clear(self):
+        if self.enabled:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = {"enabled": self.enabled, "ttl_seconds": self.ttl, "hits": self.hits, "misses": self.misses}
+        if self.enabled:
+            stats.update(self.backend.stats())
+        return stats
+
+
+def _backend_from_env() -> Optional[CacheBackend]:
+    backend = os.getenv("CACHE_BACKEND", "memory").lower()
+    if backend == "redis":
+        return RedisCacheBackend(os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+    if backend == "memory":
+        return MemoryCacheBackend(max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1024")))
+    return None
+
+
+cache_service = CacheService(_backend_from_env(), ttl=float(os.getenv("CACHE_TTL_SECONDS", "60")))
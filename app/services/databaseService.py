@@ -1,5 +1,142 @@
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Union
+from fastapi import Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session
-from ..database import SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from ..database import SessionLocal, AsyncSessionLocal, DATABASE_ASYNC, ReplicaSessionLocals, AsyncReplicaSessionLocals
+from .cacheService import cache_service
+
+logger = logging.getLogger(__name__)
+
+# Sesión que reciben los endpoints: síncrona o asíncrona según DATABASE_ASYNC
+DBSession = Union[Session, AsyncSession]
+
+# Segundos que una réplica caída queda fuera de la rotación antes de volver a probarla
+DB_REPLICA_RETRY_SECONDS = float(os.getenv("DB_REPLICA_RETRY_SECONDS", "30"))
+# Segundos tras una escritura en los que las lecturas van al primario (retraso de replicación)
+DB_READ_YOUR_WRITES_SECONDS = int(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+READ_PRIMARY_COOKIE = "read_primary"
+
+
+class ReplicaSet:
+    """
+    Réplicas de lectura en round robin con comprobación de salud.
+
+    La comprobación es el checkout de la conexión (pool_pre_ping hace el ping): una
+    réplica que falla, o cuyo pool está agotado, queda fuera durante
+    DB_REPLICA_RETRY_SECONDS y la lectura pasa a la siguiente, o al primario si no
+    queda ninguna disponible.
+
+    Después de una escritura, la cookie `read_primary` manda las lecturas de ese
+    cliente al primario durante DB_READ_YOUR_WRITES_SECONDS, aunque las atienda otro
+    proceso. Los demás clientes siguen leyendo de las réplicas; la caché no guarda
+    esas lecturas mientras dura el retraso (ver CacheService.replica_lag_seconds).
+    """
+
+    def __init__(self, session_factories, async_session_factories, retry_seconds: float, read_your_writes_seconds: int):
+        self.session_factories = session_factories
+        self.async_session_factories = async_session_factories
+        self.retry_seconds = retry_seconds
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self._lock = threading.Lock()
+        self._rotation = itertools.count()
+        self._down_until = [0.0] * max(len(session_factories), len(async_session_factories))
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._down_until)
+
+    def candidates(self) -> list[int]:
+        """
+        Índices de las réplicas disponibles, empezando por la siguiente de la rotación.
+        """
+        now = time.monotonic()
+        if not self.enabled:
+            return []
+        count = len(self._down_until)
+        start = next(self._rotation) % count
+        return [index for index in ((start + offset) % count for offset in range(count)) if self._down_until[index] <= now]
+
+    def mark_down(self, index: int, error: Exception):
+        logger.warning("Read replica %s unavailable, retrying in %ss: %s", index, self.retry_seconds, error)
+        with self._lock:
+            self._down_until[index] = time.monotonic() + self.retry_seconds
+
+    def record_write(self, response: Response):
+        """
+        Manda al primario las siguientes lecturas del cliente que escribió.
+        """
+        if not self.enabled:
+            return
+        response.set_cookie(READ_PRIMARY_COOKIE, "1", max_age=self.read_your_writes_seconds, httponly=True)
+
+    def _record_read(self, replica: bool):
+        with self._lock:
+            if replica:
+                self.replica_reads += 1
+            else:
+                self.primary_reads += 1
+
+    def session(self, request: Request, primary_factory):
+        """
+        Session de una réplica sana o, si no hay, del primario.
+        """
+        if request.cookies.get(READ_PRIMARY_COOKIE) is None:
+            for index in self.candidates():
+                db = self.session_factories[index]()
+                try:
+                    db.connection()
+                except (DBAPIError, PoolTimeoutError) as error:
+                    db.close()
+                    self.mark_down(index, error)
+                    continue
+                self._record_read(replica=True)
+                return db
+        self._record_read(replica=False)
+        return primary_factory()
+
+    async def async_session(self, request: Request, primary_factory):
+        """
+        Como `session`, con las AsyncSession de las réplicas.
+        """
+        if request.cookies.get(READ_PRIMARY_COOKIE) is None:
+            for index in self.candidates():
+                db = self.async_session_factories[index]()
+                try:
+                    await db.connection()
+                except (DBAPIError, PoolTimeoutError) as error:
+                    await db.close()
+                    self.mark_down(index, error)
+                    continue
+                self._record_read(replica=True)
+                return db
+        self._record_read(replica=False)
+        return primary_factory()
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "replicas": [{"index": index, "healthy": until <= now} for index, until in enumerate(self._down_until)],
+                "replica_reads": self.replica_reads,
+                "primary_reads": self.primary_reads,
+                "read_your_writes_seconds": self.read_your_writes_seconds,
+            }
+
+
+replica_set = ReplicaSet(ReplicaSessionLocals, AsyncReplicaSessionLocals, DB_REPLICA_RETRY_SECONDS, DB_READ_YOUR_WRITES_SECONDS)
+if replica_set.enabled:
+    cache_service.replica_lag_seconds = DB_READ_YOUR_WRITES_SECONDS
+
 
 class DatabaseService:
     """
@@ -7,13 +144,62 @@ class DatabaseService:
     """
 
     @staticmethod
-    def get_db():
+    def get_sync_db(request: Request, response: Response):
         """
         Generador que proporciona una sesión de base de datos.
         Esto asegura que la sesión se abra y cierre adecuadamente.
         """
+        if request.method != "GET":
+            replica_set.record_write(response)
         db = SessionLocal()
         try:
             yield db
         finally:
-            db.close()
\ No newline at end of file
+            db.close()
+
+    @staticmethod
+    async def get_async_db(request: Request, response: Response):
+        """
+        Generador asíncrono que proporciona una AsyncSession sobre el engine asíncrono.
+        """
+        if request.method != "GET":
+            replica_set.record_write(response)
+        async with AsyncSessionLocal() as db:
+            yield db
+
+    @staticmethod
+    def get_sync_read_db(request: Request):
+        """
+        Sesión para los GET: una réplica de lectura si hay alguna configurada y sana,
+        si no el primario (ver ReplicaSet).
+        """
+        db = replica_set.session(request, SessionLocal)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    async def get_async_read_db(request: Request):
+        """
+        Versión asíncrona de get_sync_read_db.
+        """
+        async with await replica_set.async_session(request, AsyncSessionLocal) as db:
+            yield db
+
+    # Dependencias usadas por los controladores: get_db para escrituras, get_read_db para lecturas
+    get_db = get_async_db if DATABASE_ASYNC else get_sync_db
+    get_read_db = get_async_read_db if DATABASE_ASYNC else get_sync_read_db
+
+    @staticmethod
+    async def run(db: DBSession, fn, *args, **kwargs):
+        """
+        Ejecuta una función de crud sobre la sesión sin bloquear el event loop.
+
+        Con una AsyncSession la función corre con run_sync sobre el driver asíncrono,
+        así la concurrencia queda limitada por el pool de conexiones y no por hilos.
+        Con una Session síncrona se ejecuta en el threadpool, como antes.
+        """
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, db, *args, **kwargs)
@@ -0,0 +1,79 @@
+import json
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import schemas
+from ..models import models
+from ..serialization import schema_columns
+from .databaseService import DBSession
+
+# Entidad exportable -> (modelo, esquema cuyos campos definen las columnas exportadas)
+EXPORT_ENTITIES = {
+    "pois": (models.POI, schemas.POISimple),
+    "flora": (models.Flora, schemas.Flora),
+    "fauna": (models.Fauna, schemas.Fauna),
+}
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+
+
+class ExportService:
+    """
+    Exporta tablas completas del catálogo como NDJSON o como un arreglo JSON,
+    emitido por bloques a medida que se leen las filas.
+
+    Se leen columnas (no objetos ORM) con yield_per, que en Postgres abre un cursor
+    del lado del servidor: en memoria solo vive un bloque de `chunk_size` filas,
+    sin importar el tamaño de la tabla.
+    """
+
+    @staticmethod
+    def statement(entity: str):
+        model, schema = EXPORT_ENTITIES[entity]
+        return select(*schema_columns(model, schema)).order_by(model.id)
+
+    @staticmethod
+    def _encode(rows, fmt: str, first: bool) -> bytes:
+        lines = [json.dumps(row._asdict(), ensure_ascii=False) for row in rows]
+        if fmt == "ndjson":
+            return "".join(line + "\n" for line in lines).encode()
+        body = ",".join(lines)
+        return (body if first else "," + body).encode()
+
+    def stream(self, db: DBSession, entity: str, fmt: str = "ndjson", chunk_size: int = 1000):
+        """
+        Iterador de bytes para un StreamingResponse. Usa una conexión propia del engine
+        de la sesión, que vive mientras dura la descarga y no la del request.
+        """
+        statement = self.statement(entity).execution_options(yield_per=chunk_size)
+        if isinstance(db, AsyncSession):
+            return self._stream_async(db.bind, statement, fmt)
+        return self._stream_sync(db.get_bind(), statement, fmt)
+
+    def _stream_sync(self, engine, statement, fmt: str):
+        if fmt == "json":
+            yield b"["
+        first = True
+        with engine.connect() as connection:
+            for rows in connection.execute(statement).partitions():
+                yield self._encode(rows, fmt, first)
+                first = False
+        if fmt == "json":
+            yield b"]"
+
+    async def _stream_async(self, engine, statement, fmt: str):
+        if fmt == "json":
+            yield b"["
+        first = True
+        async with engine.connect() as connection:
+            result = await connection.stream(statement)
+            async for rows in result.partitions():
+                yield self._encode(rows, fmt, first)
+                first = False
+        if fmt == "json":
+            yield b"]"
+
+
+export_service = ExportService()
@@ -0,0 +1,89 @@
+import asyncio
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# Derivatives generated for every upload: name -> longest side in pixels
+IMAGE_VARIANTS = {
+    "medium": int(os.getenv("IMAGE_MEDIUM_SIZE", "800")),
+    "thumb": int(os.getenv("IMAGE_THUMB_SIZE", "200")),
+}
+IMAGE_WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+IMAGE_PROCESS_WORKERS = int(os.getenv("IMAGE_PROCESS_WORKERS", "2"))
+
+# Uploads with derivatives are stored as <prefix>/<id>/original.<ext> next to <name>.webp
+ORIGINAL_PATTERN = re.compile(r"^(?P<base>.*/)original\.[A-Za-z0-9+.-]+$")
+
+
+def variant_urls(url: Optional[str]) -> Optional[dict]:
+    """
+    URLs of the derivatives of an uploaded original, or None when `url` was not
+    produced by the derivative pipeline (external links, older uploads).
+    """
+    match = ORIGINAL_PATTERN.match(url or "")
+    if match is None:
+        return None
+    return {name: f"{match['base']}{name}.webp" for name in IMAGE_VARIANTS}
+
+
+def render_variants(source_path: str, target_dir: str) -> Optional[dict]:
+    """
+    Resize and encode the derivatives of `source_path` into `target_dir`.
+    Runs in a worker process; returns {name: path}, or None if Pillow cannot
+    decode the file.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    sizes = sorted(IMAGE_VARIANTS.items(), key=lambda item: item[1], reverse=True)
+    try:
+        image = Image.open(source_path)
+    except UnidentifiedImageError:
+        return None
+    with image:
+        # JPEG can decode directly at a reduced scale, much cheaper than full size
+        image.draft("RGB", (sizes[0][1], sizes[0][1]))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        paths = {}
+        # Largest first: each smaller variant is resized from the previous one
+        for name, max_side in sizes:
+            image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            path = os.path.join(target_dir, f"{name}.webp")
+            image.save(path, "WEBP", quality=IMAGE_WEBP_QUALITY, method=4)
+            paths[name] = path
+    return paths
+
+
+class ImageService:
+    """
+    Runs the CPU-bound derivative work on a process pool, created on first use,
+    so resizing and encoding don't compete with request handling for the GIL.
+    """
+
+    def __init__(self, max_workers: int = IMAGE_PROCESS_WORKERS):
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._pool
+
+    async def render_variants(self, source_path: str, target_dir: str) -> Optional[dict]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, render_variants, source_path, target_dir)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+image_service = ImageService()
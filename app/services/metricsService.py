@@ -0,0 +1,217 @@
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from ..database import async_pool_stats, async_replica_pool_stats, pool_stats, pool_status, replica_pool_stats
+
+logger = logging.getLogger("botanicmap.slow_requests")
+
+# Buckets de los histogramas (segundos), estilo Prometheus
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Con SLOW_REQUEST_SECONDS > 0 las peticiones más lentas se registran con el SQL que ejecutaron
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "0"))
+SLOW_REQUEST_MAX_STATEMENTS = 50
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestMetrics:
+    """
+    Tiempos de una petición en curso, acumulados por fase: `db` (consultas),
+    `pool` (espera de conexión), `serialize`, `storage`, etc.
+    """
+
+    def __init__(self, record_statements: bool = False):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.phases: dict[str, float] = {}
+        self.record_statements = record_statements
+        self.statements: list[tuple[float, str]] = []
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        """
+        Valor de la cabecera Server-Timing (duraciones en milisegundos).
+        """
+        parts = []
+        for phase, seconds in self.phases.items():
+            description = f';desc="{self.queries} queries"' if phase == "db" else ""
+            parts.append(f"{phase};dur={seconds * 1000:.2f}{description}")
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(parts)
+
+
+# Petición en curso; run_in_threadpool y run_sync copian el contexto, así que los
+# eventos del engine y el código de los servicios ven el mismo objeto
+current_request: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request", default=None)
+
+
+class MetricsService:
+    """
+    Métricas por ruta (latencia, estado, consultas SQL y tiempo por fase) en memoria
+    del proceso, expuestas en formato de texto de Prometheus.
+    """
+
+    def __init__(self, slow_request_seconds: float = 0.0):
+        self.slow_request_seconds = slow_request_seconds
+        self._lock = threading.Lock()
+        self._requests: dict[tuple[str, str, int], int] = {}
+        self._latency: dict[tuple[str, str], Histogram] = {}
+        self._route_queries: dict[tuple[str, str], int] = {}
+        self._route_phases: dict[tuple[str, str, str], float] = {}
+        self._query_latency = Histogram(QUERY_BUCKETS)
+
+    def start_request(self) -> RequestMetrics:
+        return RequestMetrics(record_statements=self.slow_request_seconds > 0)
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Suma el tiempo del bloque a la fase `name` de la petición en curso.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_phase(name, time.perf_counter() - start)
+
+    def record_phase(self, name: str, seconds: float):
+        request = current_request.get()
+        if request is not None:
+            request.add(name, seconds)
+
+    def record_query(self, statement: str, seconds: float):
+        with self._lock:
+            self._query_latency.observe(seconds)
+        request = current_request.get()
+        if request is not None:
+            request.queries += 1
+            request.add("db", seconds)
+            if request.record_statements and len(request.statements) < SLOW_REQUEST_MAX_STATEMENTS:
+                request.statements.append((seconds, statement))
+
+    def finish_request(self, method: str, route: str, status: int, request: RequestMetrics):
+        duration = time.perf_counter() - request.started
+        with self._lock:
+            key = (method, route, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            self._latency.setdefault((method, route), Histogram(LATENCY_BUCKETS)).observe(duration)
+            self._route_queries[(method, route)] = self._route_queries.get((method, route), 0) + request.queries
+            for phase, seconds in request.phases.items():
+                phase_key = (method, route, phase)
+                self._route_phases[phase_key] = self._route_phases.get(phase_key, 0.0) + seconds
+        if self.slow_request_seconds and duration >= self.slow_request_seconds:
+            statements = "".join(f"\n  [{seconds * 1000:.2f} ms] {statement[:500]}" for seconds, statement in request.statements)
+            logger.warning(
+                "Slow request %s %s -> %s in %.1f ms (%s queries; %s)%s",
+                method, route, status, duration * 1000, request.queries, request.server_timing(), statements,
+            )
+
+    def render(self) -> str:
+        """
+        Métricas en formato de exposición de texto de Prometheus.
+        """
+        from .cacheService import cache_service
+
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def labels(**values) -> str:
+            return "{" + ",".join(f'{key}="{value}"' for key, value in values.items()) + "}"
+
+        def histogram(name: str, histogram: Histogram, **values):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{labels(**values, le=bound)} {cumulative}")
+            lines.append(f"{name}_bucket{labels(**values, le='+Inf')} {histogram.count}")
+            lines.append(f"{name}_sum{labels(**values) if values else ''} {histogram.sum}")
+            lines.append(f"{name}_count{labels(**values) if values else ''} {histogram.count}")
+
+        with self._lock:
+            metric("http_requests_total", "counter", "HTTP requests by route and status")
+            for (method, route, status), count in sorted(self._requests.items()):
+                lines.append(f"http_requests_total{labels(method=method, route=route, status=status)} {count}")
+            metric("http_request_duration_seconds", "histogram", "HTTP request latency by route")
+            for (method, route), values in sorted(self._latency.items()):
+                histogram("http_request_duration_seconds", values, method=method, route=route)
+            metric("http_request_db_queries_total", "counter", "SQL statements executed by route")
+            for (method, route), count in sorted(self._route_queries.items()):
+                lines.append(f"http_request_db_queries_total{labels(method=method, route=route)} {count}")
+            metric("http_request_phase_seconds_total", "counter", "Time spent per phase (db, pool, serialize, storage) by route")
+            for (method, route, phase), seconds in sorted(self._route_phases.items()):
+                lines.append(f"http_request_phase_seconds_total{labels(method=method, route=route, phase=phase)} {seconds}")
+            metric("db_query_duration_seconds", "histogram", "SQL statement latency")
+            histogram("db_query_duration_seconds", self._query_latency)
+
+        pools = pool_status()
+        for name, kind, key, help_text in (
+            ("db_pool_checked_out", "gauge", "checked_out", "Connections currently checked out"),
+            ("db_pool_overflow", "gauge", "overflow", "Connections open beyond pool_size"),
+            ("db_pool_checkouts_total", "counter", "checkouts", "Connection checkouts"),
+            ("db_pool_timeouts_total", "counter", "timeouts", "Checkouts that timed out"),
+            ("db_pool_wait_seconds_total", "counter", "wait_seconds_total", "Time spent waiting for a connection"),
+        ):
+            metric(name, kind, help_text)
+            for pool, status in pools.items():
+                if key in status:
+                    lines.append(f"{name}{labels(pool=pool)} {status[key]}")
+
+        cache = cache_service.stats()
+        metric("cache_hits_total", "counter", "Read cache hits")
+        lines.append(f"cache_hits_total {cache['hits']}")
+        metric("cache_misses_total", "counter", "Read cache misses")
+        lines.append(f"cache_misses_total {cache['misses']}")
+        return "\n".join(lines) + "\n"
+
+
+metrics_service = MetricsService(slow_request_seconds=SLOW_REQUEST_SECONDS)
+
+
+# Espera por una conexion del pool, atribuida a la peticion que la pidio
+for _stats in (pool_stats, async_pool_stats, *replica_pool_stats, *async_replica_pool_stats):
+    _stats.wait_listeners.append(lambda seconds: metrics_service.record_phase("pool", seconds))
+
+# Los eventos se registran en la clase Engine: cubren el engine síncrono de
+# app/database.py y el sync_engine del engine asíncrono
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["metrics_query_start"].pop()
+    metrics_service.record_query(statement, time.perf_counter() - started)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    # La consulta falló: descarta su marca de inicio para no desalinear la pila
+    starts = context.connection.info.get("metrics_query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
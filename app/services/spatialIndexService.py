@@ -0,0 +1,367 @@
+import heapq
+import math
+import os
+import threading
+import time
+from typing import NamedTuple, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from ..models import models
+
+EARTH_RADIUS_M = 6371008.8
+# Límite de latitud de la proyección Web Mercator usada por los mapas
+MERCATOR_MAX_LAT = 85.05112878
+# Celdas de cluster por lado de una tesela de mapa (256 px -> celdas de 64 px)
+CLUSTER_CELLS_PER_TILE = 4
+
+
+class POIPoint(NamedTuple):
+    id: int
+    nombre: str
+    tipo: str
+    latitud: float
+    longitud: float
+
+
+class POICluster(NamedTuple):
+    latitud: float
+    longitud: float
+    cantidad: int
+    # id del POI cuando el cluster tiene uno solo
+    id: Optional[int]
+
+
+def mercator(lat: float, lon: float) -> tuple[float, float]:
+    """
+    Coordenadas Web Mercator normalizadas a [0, 1) (x hacia el este, y hacia el sur).
+    """
+    lat = max(-MERCATOR_MAX_LAT, min(MERCATOR_MAX_LAT, lat))
+    x = (lon + 180.0) / 360.0
+    y = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0
+    return min(x, 1.0 - 1e-12), min(max(y, 0.0), 1.0 - 1e-12)
+
+
+def tile_bounds(zoom: int, x: int, y: int) -> tuple[float, float, float, float]:
+    """
+    (min_lat, min_lon, max_lat, max_lon) de la tesela XYZ `zoom/x/y`. Las teselas de
+    los bordes se extienden hasta los polos para incluir los puntos fuera de Mercator.
+    """
+    tiles = 1 << zoom
+    min_lon = x / tiles * 360.0 - 180.0
+    max_lon = (x + 1) / tiles * 360.0 - 180.0
+    max_lat = 90.0 if y == 0 else math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / tiles))))
+    min_lat = -90.0 if y == tiles - 1 else math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * (y + 1) / tiles))))
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Distancia en metros entre dos coordenadas.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+class SpatialIndexService:
+    """
+    Índice espacial en memoria (rejilla regular de celdas de `cell_size` grados)
+    para responder consultas por cercanía y por área sin recorrer todos los POIs.
+
+    Además mantiene una pirámide de clusters por zoom (0..`cluster_max_zoom`) sobre
+    la rejilla Web Mercator: cada celda guarda cantidad y suma de coordenadas, y se
+    actualiza en cada alta o baja, así un mapa alejado no recorre los POIs.
+
+    El índice se construye en la primera consulta, se actualiza en cada create/delete
+    hecho por este proceso y cada `refresh_seconds` compara una huella barata de la
+    tabla (count, max id) para recoger las escrituras hechas por otros workers.
+    """
+
+    def __init__(self, cell_size: float = 0.05, refresh_seconds: float = 60.0, cluster_max_zoom: int = 10):
+        self.cell_size = cell_size
+        self.refresh_seconds = refresh_seconds
+        self.cluster_max_zoom = cluster_max_zoom
+        self._cells: dict[tuple[int, int], dict[int, POIPoint]] = {}
+        self._points: dict[int, POIPoint] = {}
+        self._clusters = self._empty_clusters()
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._fingerprint = None
+        self._checked_at = 0.0
+        # Altas y bajas aplicadas por este proceso, para detectar las que ocurren durante una recarga
+        self._writes = 0
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return (math.floor(lat / self.cell_size), math.floor(lon / self.cell_size))
+
+    @staticmethod
+    def _fingerprint_of(db: Session):
+        return tuple(db.query(func.count(models.POI.id), func.max(models.POI.id)).one())
+
+    def ensure_loaded(self, db: Session):
+        """
+        Construye el índice si aún no existe o si la tabla cambió desde la última carga.
+        Las consultas a la base de datos se hacen sin el lock.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._loaded and now - self._checked_at < self.refresh_seconds:
+                return
+        fingerprint = self._fingerprint_of(db)
+        with self._lock:
+            self._checked_at = now
+            if self._loaded and fingerprint == self._fingerprint:
+                return
+        self.rebuild(db, fingerprint)
+
+    def rebuild(self, db: Session, fingerprint=None):
+        """
+        Relee la tabla y construye las estructuras nuevas fuera del lock; el lock solo
+        se toma para reemplazarlas, así las consultas no esperan a la recarga.
+        """
+        writes = self._writes
+        if fingerprint is None:
+            fingerprint = self._fingerprint_of(db)
+        rows = db.query(
+            models.POI.id, models.POI.nombre, models.POI.tipo, models.POI.latitud, models.POI.longitud
+        ).all()
+        fresh = SpatialIndexService(self.cell_size, self.refresh_seconds, self.cluster_max_zoom)
+        for row in rows:
+            fresh._insert(POIPoint(*row))
+        with self._lock:
+            self._cells, self._points, self._clusters = fresh._cells, fresh._points, fresh._clusters
+            self._fingerprint = fingerprint
+            # Un add/remove durante la recarga puede no estar en las filas leídas: la
+            # siguiente consulta vuelve a comparar la huella
+            self._checked_at = time.monotonic() if writes == self._writes else 0.0
+            self._loaded = True
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = False
+
+    def _insert(self, point: POIPoint):
+        self._discard(point.id)
+        if point.latitud is None or point.longitud is None:
+            return
+        self._points[point.id] = point
+        self._cells.setdefault(self._cell(point.latitud, point.longitud), {})[point.id] = point
+        self._update_clusters(point, 1)
+
+    def _discard(self, poi_id: int):
+        point = self._points.pop(poi_id, None)
+        if point is not None:
+            cell = self._cell(point.latitud, point.longitud)
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.pop(poi_id, None)
+                if not bucket:
+                    del self._cells[cell]
+            self._update_clusters(point, -1)
+
+    def _empty_clusters(self) -> list[dict[tuple[int, int], list]]:
+        return [{} for _ in range(self.cluster_max_zoom + 1)]
+
+    def _cluster_cell(self, lat: float, lon: float, zoom: int) -> tuple[int, int]:
+        x, y = mercator(lat, lon)
+        cells = CLUSTER_CELLS_PER_TILE << zoom
+        return int(x * cells), int(y * cells)
+
+    def _update_clusters(self, point: POIPoint, sign: int):
+        # La celda de cada zoom se obtiene de la del zoom máximo desplazando bits,
+        # porque cada nivel divide cada celda del anterior en 2x2
+        col, row = self._cluster_cell(point.latitud, point.longitud, self.cluster_max_zoom)
+        for zoom in range(self.cluster_max_zoom, -1, -1):
+            shift = self.cluster_max_zoom - zoom
+            key = (col >> shift, row >> shift)
+            level = self._clusters[zoom]
+            # [cantidad, suma de latitudes, suma de longitudes, suma de ids]
+            entry = level.get(key)
+            if entry is None:
+                entry = level[key] = [0, 0.0, 0.0, 0]
+            entry[0] += sign
+            entry[1] += sign * point.latitud
+            entry[2] += sign * point.longitud
+            entry[3] += sign * point.id
+            if entry[0] <= 0:
+                del level[key]
+
+    def add(self, poi: models.POI):
+        """
+        Registra un POI recién creado. Si el índice aún no se ha cargado no hace nada:
+        la siguiente consulta lo leerá de la base de datos.
+        """
+        with self._lock:
+            self._writes += 1
+            if not self._loaded:
+                return
+            self._insert(POIPoint(poi.id, poi.nombre, poi.tipo, poi.latitud, poi.longitud))
+            # Mantiene la huella al día para no reconstruir por una escritura propia
+            if self._fingerprint is not None:
+                count, max_id = self._fingerprint
+                self._fingerprint = (count + 1, max(max_id or 0, poi.id))
+
+    def remove(self, poi_id: int):
+        """
+        Quita un POI eliminado de la base de datos.
+        """
+        with self._lock:
+            self._writes += 1
+            if not self._loaded:
+                return
+            self._discard(poi_id)
+            if self._fingerprint is not None:
+                count, max_id = self._fingerprint
+                self._fingerprint = (count - 1, max_id)
+
+    def _candidates(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float):
+        min_row, min_col = self._cell(min_lat, min_lon)
+        max_row, max_col = self._cell(max_lat, max_lon)
+        cell_count = (max_row - min_row + 1) * (max_col - min_col + 1)
+        if cell_count > len(self._cells):
+            # Para ventanas muy grandes es más barato recorrer solo las celdas ocupadas
+            cells = (
+                (cell, bucket) for cell, bucket in self._cells.items()
+                if min_row <= cell[0] <= max_row and min_col <= cell[1] <= max_col
+            )
+        else:
+            cells = (
+                ((row, col), self._cells[(row, col)])
+                for row in range(min_row, max_row + 1)
+                for col in range(min_col, max_col + 1)
+                if (row, col) in self._cells
+            )
+        points = []
+        for (row, col), bucket in cells:
+            if min_row < row < max_row and min_col < col < max_col:
+                # Las celdas interiores caen completas dentro de la ventana
+                points.extend(bucket.values())
+            else:
+                points.extend(
+                    point for point in bucket.values()
+                    if min_lat <= point.latitud <= max_lat and min_lon <= point.longitud <= max_lon
+                )
+        return points
+
+    def _window(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float):
+        with self._lock:
+            if min_lon > max_lon:
+                return (
+                    self._candidates(min_lat, min_lon, max_lat, 180.0)
+                    + self._candidates(min_lat, -180.0, max_lat, max_lon)
+                )
+            return self._candidates(min_lat, min_lon, max_lat, max_lon)
+
+    def bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float, limit: Optional[int] = None):
+        """
+        POIs dentro del rectángulo ordenados por id. Si min_lon > max_lon la ventana
+        cruza el antimeridiano.
+        """
+        points = self._window(min_lat, min_lon, max_lat, max_lon)
+        if limit is not None and limit < len(points):
+            return heapq.nsmallest(limit, points, key=lambda point: point.id)
+        points.sort(key=lambda point: point.id)
+        return points
+
+    def tile(self, zoom: int, x: int, y: int):
+        """
+        POIs de la tesela XYZ `zoom/x/y` ordenados por id. Un punto en el borde entre
+        dos teselas pertenece solo a una (la de su celda Mercator).
+        """
+        tiles = 1 << zoom
+        points = []
+        for point in self._window(*tile_bounds(zoom, x, y)):
+            px, py = mercator(point.latitud, point.longitud)
+            if int(px * tiles) == x and int(py * tiles) == y:
+                points.append(point)
+        points.sort(key=lambda point: point.id)
+        return points
+
+    def _cluster_ranges(self, min_lat, min_lon, max_lat, max_lon, zoom):
+        # Rangos (col, fila) de celdas de la ventana; dos rangos si cruza el antimeridiano
+        cells = CLUSTER_CELLS_PER_TILE << zoom
+        min_col, max_row = self._cluster_cell(min_lat, min_lon, zoom)
+        max_col, min_row = self._cluster_cell(max_lat, max_lon, zoom)
+        if min_lon > max_lon:
+            return [(min_col, cells - 1, min_row, max_row), (0, max_col, min_row, max_row)]
+        return [(min_col, max_col, min_row, max_row)]
+
+    def clusters(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float, zoom: int):
+        """
+        Clusters de la ventana para el zoom del mapa: centroide y cantidad de POIs por
+        celda de 64 px. Hasta `cluster_max_zoom` se leen de la pirámide precalculada
+        (costo proporcional a las celdas visibles); más cerca se agrupan al vuelo los
+        POIs de la ventana, que a ese zoom son pocos.
+        """
+        with self._lock:
+            if zoom <= self.cluster_max_zoom:
+                level = self._clusters[zoom]
+                entries = []
+                for min_col, max_col, min_row, max_row in self._cluster_ranges(min_lat, min_lon, max_lat, max_lon, zoom):
+                    if (max_col - min_col + 1) * (max_row - min_row + 1) > len(level):
+                        entries.extend(
+                            entry for (col, row), entry in level.items()
+                            if min_col <= col <= max_col and min_row <= row <= max_row
+                        )
+                    else:
+                        entries.extend(
+                            level[(col, row)]
+                            for col in range(min_col, max_col + 1)
+                            for row in range(min_row, max_row + 1)
+                            if (col, row) in level
+                        )
+            else:
+                grouped = {}
+                for point in self._window(min_lat, min_lon, max_lat, max_lon):
+                    key = self._cluster_cell(point.latitud, point.longitud, zoom)
+                    entry = grouped.get(key)
+                    if entry is None:
+                        entry = grouped[key] = [0, 0.0, 0.0, 0]
+                    entry[0] += 1
+                    entry[1] += point.latitud
+                    entry[2] += point.longitud
+                    entry[3] += point.id
+                entries = list(grouped.values())
+            return [
+                POICluster(lat / count, lon / count, count, ids if count == 1 else None)
+                for count, lat, lon, ids in entries
+            ]
+
+    def nearby(self, lat: float, lon: float, radius: float, limit: Optional[int] = None):
+        """
+        POIs a menos de `radius` metros de (lat, lon), ordenados por distancia.
+        Devuelve tuplas (POIPoint, distancia en metros).
+        """
+        # Ventana con el mismo radio terrestre que haversine. El ancho en longitud es el
+        # del punto de tangencia del círculo (asin(sin d / cos lat)), mayor que el del
+        # centro; si el círculo contiene un polo entran todas las longitudes
+        angle = radius / EARTH_RADIUS_M
+        dlat = math.degrees(angle)
+        min_lat, max_lat = lat - dlat, lat + dlat
+        if min_lat <= -90.0 or max_lat >= 90.0:
+            min_lat, max_lat = max(-90.0, min_lat), min(90.0, max_lat)
+            min_lon, max_lon = -180.0, 180.0
+        else:
+            dlon = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(lat)))))
+            min_lon, max_lon = lon - dlon, lon + dlon
+            if min_lon < -180.0:
+                min_lon += 360.0
+            elif max_lon > 180.0:
+                max_lon -= 360.0
+
+        results = []
+        for point in self._window(min_lat, min_lon, max_lat, max_lon):
+            distance = haversine(lat, lon, point.latitud, point.longitud)
+            if distance <= radius:
+                results.append((point, distance))
+        results.sort(key=lambda item: item[1])
+        return results[:limit] if limit is not None else results
+
+
+spatial_index = SpatialIndexService(
+    cell_size=float(os.getenv("SPATIAL_INDEX_CELL_SIZE", "0.05")),
+    refresh_seconds=float(os.getenv("SPATIAL_INDEX_REFRESH_SECONDS", "60")),
+    cluster_max_zoom=int(os.getenv("SPATIAL_INDEX_CLUSTER_MAX_ZOOM", "10")),
+)
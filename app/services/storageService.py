@@ -1,33 +1,93 @@
+import asyncio
+import hashlib
+import json
 import os
-import uuid
-from io import BytesIO
+import shutil
+import sqlite3
+import tempfile
+import threading
+from typing import BinaryIO, Optional
 from fastapi import UploadFile, HTTPException
-import firebase_admin
-from firebase_admin import credentials, storage
-from google.cloud import storage as gcs
-from ..environment import serviceAccountKey
-
-class FirebaseStorageService:
-    def __init__(self):
-        """
-        Initialize Firebase Storage service
-        """
-        # Check if Firebase app is already initialized to prevent duplicate initialization
-        if not firebase_admin._apps:
-            firebase_admin.initialize_app(
-                credential=serviceAccountKey.cred, 
-                options={
-                    'storageBucket': 'my-project-4848-1683442933444.firebasestorage.appspot.com'
-                }
-            )
-        self.bucket_name = 'my-project-4848-1683442933444.firebasestorage.app'
-        # Get the default bucket correctly
-        self.bucket = storage.bucket(self.bucket_name)
-        self.configure_cors()
+from fastapi.concurrency import run_in_threadpool
+from .. import startup
+from .imageService import IMAGE_VARIANTS, image_service
+from .metricsService import metrics_service
+
+# Resumable uploads are sent in chunks; GCS requires a multiple of 256 KiB
+CHUNK_ALIGNMENT = 256 * 1024
+UPLOAD_CHUNK_SIZE = max(1, int(os.getenv("STORAGE_UPLOAD_CHUNK_SIZE", str(1024 * 1024))) // CHUNK_ALIGNMENT) * CHUNK_ALIGNMENT
+MAX_CONCURRENT_UPLOADS = int(os.getenv("STORAGE_MAX_CONCURRENT_UPLOADS", "4"))
+
+# "firebase" (default) or "local"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firebase").lower()
+LOCAL_STORAGE_DIR = os.getenv("STORAGE_LOCAL_DIR", "media")
+LOCAL_STORAGE_URL = os.getenv("STORAGE_LOCAL_URL", "/media")
+
+IMAGE_PREFIX = "images"
+# Local hash -> URLs index used to skip uploads of content already stored
+STORAGE_INDEX_PATH = os.getenv("STORAGE_INDEX_PATH", ".storage_index.sqlite3")
+
+FIREBASE_APP_BUCKET = 'my-project-4848-1683442933444.firebasestorage.appspot.com'
+FIREBASE_BUCKET = 'my-project-4848-1683442933444.firebasestorage.app'
+
+
+class StorageBackend:
+    """
+    Where uploaded files end up. Methods are blocking and run in a worker thread.
+    """
+
+    def save(self, fileobj: BinaryIO, name: str, content_type: str) -> str:
+        """
+        Store the file under `name` and return its public URL.
+        """
+        raise NotImplementedError
+
+    def exists(self, name: str) -> bool:
+        raise NotImplementedError
+
+    def url(self, name: str) -> str:
+        """
+        Public URL of `name`, without checking that it exists.
+        """
+        raise NotImplementedError
+
+
+class FirebaseStorageBackend(StorageBackend):
+    """
+    Firebase Storage bucket. The SDK and the credentials are loaded on first use,
+    so importing the app does not touch the network or require the service account.
+    """
+
+    def __init__(self, bucket_name: str = FIREBASE_BUCKET):
+        self.bucket_name = bucket_name
+        self._bucket = None
+        self._lock = threading.Lock()
+
+    @property
+    def bucket(self):
+        with self._lock:
+            if self._bucket is None:
+                with startup.phase("storage_init"):
+                    import firebase_admin
+                    from firebase_admin import storage
+                    from ..environment import serviceAccountKey
+
+                    # Check if Firebase app is already initialized to prevent duplicate initialization
+                    if not firebase_admin._apps:
+                        firebase_admin.initialize_app(
+                            credential=serviceAccountKey.cred,
+                            options={'storageBucket': FIREBASE_APP_BUCKET}
+                        )
+                    self._bucket = storage.bucket(self.bucket_name)
+            return self._bucket
 
     def configure_cors(self):
         """
-        Configure CORS for Firebase Storage bucket
+        Configure CORS for Firebase Storage bucket.
+
+        This is bucket configuration that persists remotely; run it once per
+        deployment (`python -m app.services.storageService configure-cors`)
+        instead of on every boot.
         """
         cors_configuration = [{
             "origin": ["*"],
@@ -35,44 +95,224 @@ class FirebaseStorageService:
             "method": ["GET", "HEAD", "PUT", "POST", "DELETE"],
             "maxAgeSeconds": 3600
         }]
-        
+
         # Set the CORS configuration on the bucket
         self.bucket.cors = cors_configuration
         self.bucket.patch()
 
-    async def upload_image(self, file: UploadFile) -> str:
+    def save(self, fileobj: BinaryIO, name: str, content_type: str) -> str:
+        """
+        With `chunk_size` set the SDK does a resumable upload that reads the
+        spooled file one chunk at a time, so memory does not grow with file size.
+        """
+        blob = self.bucket.blob(name)
+        blob.chunk_size = UPLOAD_CHUNK_SIZE
+        blob.upload_from_file(fileobj, content_type=content_type, rewind=True)
+        blob.make_public()
+        return blob.public_url
+
+    def exists(self, name: str) -> bool:
+        return self.bucket.blob(name).exists()
+
+    def url(self, name: str) -> str:
+        return self.bucket.blob(name).public_url
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Files on local disk, served by the app under `base_url`. Useful for
+    development, tests and benchmarking the image path offline.
+    """
+
+    def __init__(self, root: str = LOCAL_STORAGE_DIR, base_url: str = LOCAL_STORAGE_URL):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def save(self, fileobj: BinaryIO, name: str, content_type: str) -> str:
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fileobj.seek(0)
+        with open(path, "wb") as target:
+            shutil.copyfileobj(fileobj, target, UPLOAD_CHUNK_SIZE)
+        return self.url(name)
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(os.path.join(self.root, name))
+
+    def url(self, name: str) -> str:
+        return f"{self.base_url}/{name}"
+
+
+class ContentIndex:
+    """
+    SQLite file mapping content keys (sha256 + extension) to the stored URLs.
+    A hit answers "is this upload already stored?" without a remote round trip;
+    it is shared by the workers of one host.
+    """
+
+    def __init__(self, path: str = STORAGE_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS images (key TEXT PRIMARY KEY, urls TEXT NOT NULL)")
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connection.execute("SELECT urls FROM images WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: str, urls: dict):
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO images (key, urls) VALUES (?, ?)", (key, json.dumps(urls)))
+
+
+def _backend_from_env() -> StorageBackend:
+    if STORAGE_BACKEND == "local":
+        return LocalStorageBackend()
+    return FirebaseStorageBackend()
+
+
+class StorageService:
+    def __init__(self, backend: Optional[StorageBackend] = None, index: Optional[ContentIndex] = None):
+        """
+        Initialize the storage service. The backend and the content index are
+        created on first use unless given.
+        """
+        self._backend = backend
+        self._index = index
+        # (loop, semaphore) bounding the uploads of that loop, see upload_slots
+        self._slots: Optional[tuple[asyncio.AbstractEventLoop, asyncio.Semaphore]] = None
+
+    @property
+    def backend(self) -> StorageBackend:
+        if self._backend is None:
+            self._backend = _backend_from_env()
+        return self._backend
+
+    @property
+    def upload_slots(self) -> asyncio.Semaphore:
+        """
+        Bounds how many uploads hold a worker thread and a chunk buffer at once.
+        A semaphore binds to the loop it first waits on, so one is created per
+        running loop (tests, benchmarks and TestClient each start their own).
+        """
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots[0] is not loop:
+            self._slots = (loop, asyncio.Semaphore(MAX_CONCURRENT_UPLOADS))
+        return self._slots[1]
+
+    @property
+    def index(self) -> ContentIndex:
+        if self._index is None:
+            self._index = ContentIndex()
+        return self._index
+
+    def configure(self, backend: Optional[StorageBackend], index: Optional[ContentIndex] = None):
+        """
+        Replace the storage backend and content index (e.g. local ones in tests).
+        """
+        self._backend = backend
+        self._index = index
+
+    @staticmethod
+    def _spool_to_disk(fileobj: BinaryIO, extension: str):
+        """
+        Copy the upload to a temporary directory so a worker process can read it
+        without pickling the bytes, hashing it on the way.
+        Returns (directory, path of the original, sha256 hex digest).
         """
-        Upload an image to Firebase Storage
-        
+        workdir = tempfile.mkdtemp(prefix="upload-")
+        source = os.path.join(workdir, f"source.{extension}")
+        digest = hashlib.sha256()
+        fileobj.seek(0)
+        with open(source, "wb") as target:
+            while chunk := fileobj.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                target.write(chunk)
+        return workdir, source, digest.hexdigest()
+
+    def _lookup(self, image_id: str, extension: str) -> Optional[dict]:
+        """
+        URLs of an identical upload stored before: first the local index, then a
+        single existence check on the backend (e.g. uploaded from another host).
+        """
+        key = f"{image_id}.{extension}"
+        urls = self.index.get(key)
+        if urls is not None:
+            return urls
+        # The original is saved last, so its presence means the derivatives are there too
+        if self.backend.exists(f"{IMAGE_PREFIX}/{image_id}/original.{extension}"):
+            urls = {"original": self.backend.url(f"{IMAGE_PREFIX}/{image_id}/original.{extension}")}
+            urls.update((name, self.backend.url(f"{IMAGE_PREFIX}/{image_id}/{name}.webp")) for name in IMAGE_VARIANTS)
+        elif self.backend.exists(f"{IMAGE_PREFIX}/{image_id}.{extension}"):
+            urls = {"original": self.backend.url(f"{IMAGE_PREFIX}/{image_id}.{extension}")}
+        if urls is not None:
+            self.index.put(key, urls)
+        return urls
+
+    def _store(self, image_id: str, extension: str, content_type: str, source: str, variants: Optional[dict]) -> dict:
+        """
+        Save the original and its derivatives. Files Pillow could not decode keep
+        the flat <id>.<ext> name, so no derivative URLs are advertised for them.
+        """
+        urls = {}
+        if variants is None:
+            with open(source, "rb") as fileobj:
+                urls["original"] = self.backend.save(fileobj, f"{IMAGE_PREFIX}/{image_id}.{extension}", content_type)
+        else:
+            derivatives = {}
+            for name, path in variants.items():
+                with open(path, "rb") as fileobj:
+                    derivatives[name] = self.backend.save(fileobj, f"{IMAGE_PREFIX}/{image_id}/{name}.webp", "image/webp")
+            with open(source, "rb") as fileobj:
+                urls["original"] = self.backend.save(fileobj, f"{IMAGE_PREFIX}/{image_id}/original.{extension}", content_type)
+            urls.update(derivatives)
+        self.index.put(f"{image_id}.{extension}", urls)
+        return urls
+
+    async def upload_image(self, file: UploadFile) -> dict:
+        """
+        Upload an image and its derivatives (see imageService.IMAGE_VARIANTS)
+
         :param file: UploadFile from FastAPI
-        :return: Public URL of the uploaded image
+        :return: Public URLs by variant: "original", "medium", "thumb"
         """
-        try:
-            # Validate file is an image
-            if not file.content_type.startswith('image/'):
-                raise HTTPException(status_code=400, detail="File must be an image")
+        # Validate file is an image
+        if not file.content_type or not file.content_type.startswith('image/'):
+            raise HTTPException(status_code=400, detail="File must be an image")
 
-            # Generate unique filename
+        try:
             file_extension = file.content_type.split('/')[-1]
-            unique_filename = f"{uuid.uuid4()}.{file_extension}"
-            
-            # Create a new blob and upload the file's content
-            blob = self.bucket.blob(unique_filename)
-            
-            # Read the contents of the uploaded file
-            contents = await file.read()
-            
-            # Upload file to Firebase Storage
-            blob.upload_from_string(
-                contents, 
-                content_type=file.content_type
-            )
-            
-            # Make the blob publicly accessible
-            blob.make_public()
-            
-            # Return the public URL
-            return blob.public_url
+
+            async with self.upload_slots:
+                # Content-addressed: the id is the sha256 of the bytes
+                workdir, source, image_id = await run_in_threadpool(self._spool_to_disk, file.file, file_extension)
+                try:
+                    # Same content already stored: reuse its URLs without sending any bytes
+                    with metrics_service.phase("storage"):
+                        urls = await run_in_threadpool(self._lookup, image_id, file_extension)
+                    if urls is not None:
+                        return urls
+                    # Resize/encode on the process pool, then stream everything to storage off the event loop
+                    with metrics_service.phase("resize"):
+                        variants = await image_service.render_variants(source, workdir)
+                    with metrics_service.phase("storage"):
+                        return await run_in_threadpool(self._store, image_id, file_extension, file.content_type, source, variants)
+                finally:
+                    shutil.rmtree(workdir, ignore_errors=True)
 
         except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
\ No newline at end of file
+            raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+
+
+storage_service = StorageService()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ["configure-cors"]:
+        FirebaseStorageBackend().configure_cors()
+        print("CORS configured")
+    else:
+        print("usage: python -m app.services.storageService configure-cors")
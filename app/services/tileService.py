@@ -0,0 +1,39 @@
+import msgpack
+from .metricsService import metrics_service
+
+TILE_MEDIA_TYPE = "application/x-msgpack"
+
+
+class TileService:
+    """
+    Codifica las teselas de la capa de POIs del mapa en MessagePack.
+
+    Una tesela es un mapa `{"tipos": [...], "pois": [[id, latitud, longitud, tipo, nombre], ...]}`
+    donde `tipo` es el índice en `tipos`: cada tipo se envía una vez por tesela y cada
+    POI es un arreglo sin nombres de campo. Las coordenadas van en float32 (~1 m de
+    precisión), suficiente para dibujar el marcador; el detalle sigue en getPoiById.
+    """
+
+    def encode(self, points) -> bytes:
+        with metrics_service.phase("serialize"):
+            tipos: dict[str, int] = {}
+            pois = [
+                [point.id, point.latitud, point.longitud, tipos.setdefault(point.tipo, len(tipos)), point.nombre]
+                for point in points
+            ]
+            return msgpack.packb({"tipos": list(tipos), "pois": pois}, use_single_float=True)
+
+    @staticmethod
+    def decode(body: bytes) -> list[dict]:
+        """
+        Inverso de `encode` como lista de diccionarios (pruebas y clientes en Python).
+        """
+        tile = msgpack.unpackb(body)
+        tipos = tile["tipos"]
+        return [
+            {"id": poi_id, "latitud": lat, "longitud": lon, "tipo": tipos[tipo], "nombre": nombre}
+            for poi_id, lat, lon, tipo, nombre in tile["pois"]
+        ]
+
+
+tile_service = TileService()
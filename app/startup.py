@@ -0,0 +1,31 @@
+import time
+from contextlib import contextmanager
+
+# Referencia de tiempo: primera importación de la app (main.py la importa primero)
+STARTED = time.perf_counter()
+
+# Fase -> segundos. Solo se guarda la primera medición de cada fase
+timings: dict[str, float] = {}
+
+
+def record(name: str, seconds: float):
+    timings.setdefault(name, seconds)
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Mide el bloque como fase del arranque.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+def report() -> dict:
+    """
+    Desglose del arranque en milisegundos: import, db_connect, storage_init, ready.
+    """
+    return {name: round(seconds * 1000, 2) for name, seconds in timings.items()}
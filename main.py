@@ -1,16 +1,60 @@
+import asyncio
+import logging
 import os
+import time
+from contextlib import asynccontextmanager
+from app import startup
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from fastapi.staticfiles import StaticFiles
 from fastapi import status
-from app.controllers import poi, flora, fauna, image
-from app.database import Base, engine
-from app.models import models
+from app import migrations
+from app.controllers import poi, flora, fauna, image, search, export
+from app.database import engine, pool_status
+from app.middleware import MetricsMiddleware
+from app.pagination import NEXT_CURSOR_HEADER
+from app.services.cacheService import cache_service
+from app.services.databaseService import replica_set
+from app.services.imageService import image_service
+from app.services.metricsService import metrics_service
+from app.services.storageService import STORAGE_BACKEND, LOCAL_STORAGE_DIR, LOCAL_STORAGE_URL
 
-models.Base.metadata.create_all(bind=engine)
+logger = logging.getLogger("botanicmap.startup")
+
+# El esquema se gestiona con `python -m app.migrations upgrade` (paso de despliegue en
+# start.sh). Al arrancar solo se comprueba la versión, en segundo plano, para no
+# retrasar las primeras peticiones con la conexión TLS a la base de datos
+DB_SCHEMA_CHECK = os.getenv("DB_SCHEMA_CHECK", "true").lower() in ("1", "true", "yes")
+
+def check_schema():
+    try:
+        with startup.phase("db_connect"):
+            schema = migrations.check(engine)
+    except Exception as e:
+        logger.warning("Schema check failed: %s", e)
+        return
+    if schema["pending"]:
+        logger.warning(
+            "Database schema is at version %s, pending migrations %s: run `python -m app.migrations upgrade`",
+            schema["current"], schema["pending"],
+        )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup.record("ready", time.perf_counter() - startup.STARTED)
+    logger.info("Startup timings (ms): %s", startup.report())
+    schema_check = asyncio.create_task(run_in_threadpool(check_schema)) if DB_SCHEMA_CHECK else None
+    yield
+    if schema_check is not None:
+        schema_check.cancel()
+    image_service.shutdown()
 
 app = FastAPI(
     title="Marketplace API",
-    debug=True
+    debug=True,
+    lifespan=lifespan
 )
 
 # Configuración de CORS
@@ -24,12 +68,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing"],
 )
 
+# Se añade despues de CORS para quedar por fuera y medir la peticion completa
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(poi.router)
 app.include_router(flora.router)
 app.include_router(fauna.router)
 app.include_router(image.router)
+app.include_router(search.router)
+app.include_router(export.router)
+
+# Con STORAGE_BACKEND=local las imágenes subidas se sirven desde el disco
+if STORAGE_BACKEND == "local":
+    app.mount(LOCAL_STORAGE_URL, StaticFiles(directory=LOCAL_STORAGE_DIR, check_dir=False), name="media")
 
 @app.get("/")
 def read_root():
@@ -43,4 +97,45 @@ async def healthCheck():
     '''app is already working!'''
     return {"message": "All works!"}
 
+@app.get(
+        "/healthCheck/pool",
+        status_code=status.HTTP_200_OK
+        )
+async def poolCheck():
+    '''connection pool usage: checked out, overflow, wait time and connect latency'''
+    return pool_status()
+
+@app.get(
+        "/healthCheck/replicas",
+        status_code=status.HTTP_200_OK
+        )
+async def replicasCheck():
+    '''read replica health and how many reads went to replicas or to the primary'''
+    return replica_set.status()
+
+@app.get(
+        "/healthCheck/cache",
+        status_code=status.HTTP_200_OK
+        )
+async def cacheCheck():
+    '''read cache hits, misses and evictions'''
+    return cache_service.stats()
+
+@app.get(
+        "/healthCheck/startup",
+        status_code=status.HTTP_200_OK
+        )
+async def startupCheck():
+    '''cold start breakdown in ms: import, db_connect, storage_init, ready'''
+    return startup.report()
+
+@app.get(
+        "/metrics",
+        response_class=PlainTextResponse,
+        status_code=status.HTTP_200_OK
+        )
+async def metrics():
+    '''per-route latency histograms, SQL query counts and pool/cache stats in Prometheus format'''
+    return PlainTextResponse(metrics_service.render(), media_type="text/plain; version=0.0.4")
 
+startup.record("import", time.perf_counter() - startup.STARTED)
@@ -6,5 +6,8 @@ source /opt/render/project/src/.venv/bin/activate
 # Asigna el puerto especificado por Render o usa el puerto 8000 por defecto
 PORT=${PORT:-8000}
 
+# Aplica las migraciones pendientes una sola vez, antes de arrancar los workers
+python -m app.migrations upgrade || exit 1
+
 # Ejecuta la aplicación FastAPI con uvicorn
 uvicorn main:app --host 0.0.0.0 --port $PORT
\ No newline at end of file
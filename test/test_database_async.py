@@ -0,0 +1,121 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+import logging
+from main import app
+from app.database import Base
+from app.services.databaseService import DatabaseService
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Create test database engines (sync para el esquema, async para los endpoints)
+SQLALCHEMY_DATABASE_URL = "sqlite:///./testdb_async.db"
+ASYNC_SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./testdb_async.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL)
+async_engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL)
+
+# Create TestingAsyncSessionLocal class
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+async def override_get_async_db():
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+@pytest.fixture(scope="module")
+def client():
+    """
+    Fixture that points the app to the async session for this module only
+    """
+    Base.metadata.create_all(bind=engine)
+    dependencies = (DatabaseService.get_db, DatabaseService.get_read_db)
+    previous = {dependency: app.dependency_overrides.get(dependency) for dependency in dependencies}
+    for dependency in dependencies:
+        app.dependency_overrides[dependency] = override_get_async_db
+    try:
+        with TestClient(app) as client:
+            yield client
+    finally:
+        for dependency, override in previous.items():
+            if override is not None:
+                app.dependency_overrides[dependency] = override
+            else:
+                app.dependency_overrides.pop(dependency, None)
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def sample_poi_data():
+    return {
+        "nombre": "Humedal La Conejera",
+        "descripcion": "Humedal urbano",
+        "foto_url": "http://ejemplo.com/humedal.jpg",
+        "tipo": "Natural",
+        "longitud": -74.0817,
+        "latitud": 4.7589
+    }
+
+@pytest.mark.describe("Suite de pruebas del camino asíncrono de base de datos")
+class TestAsyncDatabase:
+
+    @pytest.mark.it("Debe crear, leer y eliminar usando AsyncSession")
+    def test_crud_with_async_session(self, client, sample_poi_data):
+        """
+        ID de la prueba: ASYNC_DB_001
+        Descripción: Los endpoints funcionan con una AsyncSession como dependencia
+        Entradas:
+            - POI válido
+            - Flora asociada al POI
+        Acciones:
+            1. Crear POI y flora
+            2. Leer el POI con sus hijos y la lista de POIs
+            3. Eliminar la flora
+        Resultados esperados:
+            - Código 200 en todas las operaciones
+            - El POI incluye la flora creada
+        """
+        logger.info("\n=== Iniciando prueba del camino asíncrono ===")
+
+        response = client.post("/poi/createPois", json=sample_poi_data)
+        assert response.status_code == 200, "Error al crear POI"
+        poi = response.json()
+        assert poi["flora"] == [] and poi["fauna"] == []
+
+        response = client.post("/flora/flora/", json={
+            "nombre_cientifico": "Espeletia grandiflora",
+            "nombre_comun": "Frailejón",
+            "familia": "Asteraceae",
+            "foto_url": "http://ejemplo.com/frailejon.jpg",
+            "poi_id": poi["id"]
+        })
+        assert response.status_code == 200, "Error al crear flora"
+        flora_id = response.json()["id"]
+
+        response = client.get(f"/poi/getPoiById/{poi['id']}")
+        assert response.status_code == 200, "Error al obtener POI"
+        assert [flora["id"] for flora in response.json()["flora"]] == [flora_id]
+
+        response = client.get("/poi/getAllPois?limit=10")
+        assert response.status_code == 200, "Error al obtener POIs"
+        assert len(response.json()) == 1
+
+        response = client.delete(f"/flora/flora/{flora_id}")
+        assert response.status_code == 200, "Error al eliminar flora"
+        assert client.get(f"/flora/getFloraById/{flora_id}").status_code == 404
+        logger.info("✓ Camino asíncrono verificado")
+
+    @pytest.mark.it("Debe exponer el estado del pool de conexiones")
+    def test_pool_status(self, client):
+        """
+        ID de la prueba: ASYNC_DB_002
+        Descripción: /healthCheck/pool publica el uso y las esperas del pool
+        Resultados esperados:
+            - Código 200
+            - Estadísticas de checkout, overflow y latencia de conexión
+        """
+        response = client.get("/healthCheck/pool")
+        assert response.status_code == 200, "Error al obtener el estado del pool"
+        sync_pool = response.json()["sync"]
+        for key in ["checked_out", "overflow", "wait_seconds_avg", "connect_seconds_avg", "timeouts"]:
+            assert key in sync_pool, f"Falta la estadística {key}"
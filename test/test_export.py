@@ -0,0 +1,118 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import logging
+from main import app
+from app.database import Base
+from app.services.databaseService import DatabaseService
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Create test database engine
+SQLALCHEMY_DATABASE_URL = "sqlite:///./testdb.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+# Create TestingSessionLocal class
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+Base.metadata.create_all(bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[DatabaseService.get_db] = override_get_db
+app.dependency_overrides[DatabaseService.get_read_db] = override_get_db
+
+@pytest.fixture(scope="session")
+def db():
+    """
+    Fixture that creates a test database session that persists across all tests
+    """
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+@pytest.fixture(scope="module")
+def poi_ids():
+    """
+    Crea un lote de POIs para exportar
+    """
+    client = TestClient(app)
+    response = client.post("/poi/bulk", json=[
+        {
+            "nombre": f"Sendero {i}",
+            "descripcion": "Sendero ecológico",
+            "foto_url": f"http://ejemplo.com/sendero{i}.jpg",
+            "tipo": "Natural",
+            "longitud": -75.5 + i / 100,
+            "latitud": 6.2 + i / 100
+        }
+        for i in range(25)
+    ])
+    return [poi["id"] for poi in response.json()["created"]]
+
+@pytest.mark.describe("Suite de pruebas de exportación del catálogo")
+class TestExport:
+
+    @pytest.mark.it("Debe exportar todos los POIs como NDJSON")
+    def test_export_ndjson(self, client, db, poi_ids):
+        """
+        ID de la prueba: EXPORT_001
+        Descripción: Exportación en streaming en formato NDJSON
+        Entradas:
+            - 25 POIs creados en lote
+            - chunk_size menor que el número de filas
+        Resultados esperados:
+            - Código 200 y tipo application/x-ndjson
+            - Una línea por POI, ordenadas por id, con los campos del POI
+        """
+        logger.info("\n=== Iniciando prueba de exportación NDJSON ===")
+
+        response = client.get("/export/pois?chunk_size=7")
+        assert response.status_code == 200, "Error al exportar POIs"
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        exported_ids = [row["id"] for row in rows]
+        assert set(poi_ids) <= set(exported_ids), "Faltan POIs en la exportación"
+        assert exported_ids == sorted(exported_ids), "La exportación no está ordenada por id"
+        assert set(rows[0]) == {"id", "nombre", "descripcion", "foto_url", "tipo", "longitud", "latitud"}
+
+    @pytest.mark.it("Debe exportar como arreglo JSON y validar la entidad")
+    def test_export_json(self, client, db, poi_ids):
+        """
+        ID de la prueba: EXPORT_002
+        Descripción: Exportación en formato JSON y entidades inválidas
+        Resultados esperados:
+            - El cuerpo es un arreglo JSON válido con todos los POIs
+            - Una tabla vacía produce un arreglo vacío
+            - Código 422 para una entidad desconocida
+        """
+        logger.info("\n=== Iniciando prueba de exportación JSON ===")
+
+        response = client.get("/export/pois?format=json&chunk_size=10")
+        assert response.status_code == 200, "Error al exportar POIs"
+        assert set(poi_ids) <= {row["id"] for row in response.json()}
+
+        response = client.get("/export/fauna?format=json")
+        assert response.status_code == 200
+        assert isinstance(response.json(), list)
+
+        response = client.get("/export/usuarios")
+        assert response.status_code == 422, "Se esperaba error 422 para una entidad desconocida"
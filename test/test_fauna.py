@@ -29,6 +29,7 @@ def override_get_db():
         db.close()
 
 app.dependency_overrides[DatabaseService.get_db] = override_get_db
+app.dependency_overrides[DatabaseService.get_read_db] = override_get_db
 
 @pytest.fixture(scope="session")
 def db():
@@ -263,4 +264,126 @@ class TestFaunaCrud:
         response = client.get(f"/fauna/getFaunaById/{fauna_id}")
         logger.info(f"Response al verificar eliminación de fauna: {response.json()}")
         assert response.status_code == 404, "La fauna no fue eliminada correctamente"
-        logger.info("✓ Se confirmó que la fauna fue eliminada")
\ No newline at end of file
+        logger.info("✓ Se confirmó que la fauna fue eliminada")
+    @pytest.mark.it("Debe servir lecturas repetidas desde el cache e invalidarlo al escribir")
+    def test_fauna_read_cache(self, client, db, sample_poi_data, sample_fauna_data):
+        """
+        ID de la prueba: FAUNA_CRUD_006
+        Descripción: Cache de lectura con invalidación por escritura
+        Entradas:
+            - POI y fauna válidos
+        Acciones:
+            1. Leer la misma fauna dos veces
+            2. Eliminar la fauna y volver a leerla
+            3. Leer el POI antes y después de agregarle fauna
+        Resultados esperados:
+            - La segunda lectura es un acierto del cache con la misma respuesta
+            - Tras eliminarla se obtiene 404, no la copia cacheada
+            - El detalle del POI refleja la fauna nueva
+        """
+        logger.info("\n=== Iniciando prueba del cache de lectura ===")
+
+        poi_id = client.post("/poi/createPois", json=sample_poi_data).json()["id"]
+        sample_fauna_data["poi_id"] = poi_id
+        fauna_id = client.post("/fauna/createFauna", json=sample_fauna_data).json()["id"]
+
+        first = client.get(f"/fauna/getFaunaById/{fauna_id}")
+        hits = client.get("/healthCheck/cache").json()["hits"]
+        second = client.get(f"/fauna/getFaunaById/{fauna_id}")
+        assert second.json() == first.json(), "La respuesta cacheada no coincide"
+        assert client.get("/healthCheck/cache").json()["hits"] == hits + 1, "La segunda lectura no salió del cache"
+
+        client.delete(f"/fauna/deleteFaunaById/{fauna_id}")
+        response = client.get(f"/fauna/getFaunaById/{fauna_id}")
+        assert response.status_code == 404, "Se devolvió una copia cacheada de fauna eliminada"
+
+        assert client.get(f"/poi/getPoiById/{poi_id}").json()["fauna"] == []
+        client.post("/fauna/createFauna", json=sample_fauna_data)
+        assert len(client.get(f"/poi/getPoiById/{poi_id}").json()["fauna"]) == 1, "El detalle del POI no se invalidó"
+        logger.info("✓ Cache de lectura verificado")
+
+    @pytest.mark.it("Debe filtrar por especie, hábitat y POI usando índices")
+    def test_fauna_filters(self, client, db, sample_poi_data, sample_fauna_data):
+        """
+        ID de la prueba: FAUNA_CRUD_007
+        Descripción: Filtros especie, habitat y poi_id en getAllFauna
+        Entradas:
+            - Fauna de dos especies y dos hábitats en dos POIs
+        Resultados esperados:
+            - Cada filtro y su combinación devuelven solo las filas que coinciden
+            - La consulta filtrada usa un índice compuesto en lugar de recorrer la tabla
+        """
+        from sqlalchemy import text
+        from app import crud
+
+        logger.info("\n=== Iniciando prueba de filtros de fauna ===")
+
+        poi_ids = [client.post("/poi/createPois", json=sample_poi_data).json()["id"] for _ in range(2)]
+        combinaciones = [("Ave filtro", "Humedal filtro", poi_ids[0]), ("Ave filtro", "Bosque filtro", poi_ids[1]), ("Reptil filtro", "Humedal filtro", poi_ids[0])]
+        ids = [
+            client.post("/fauna/createFauna", json={**sample_fauna_data, "especie": especie, "habitat": habitat, "poi_id": poi_id}).json()["id"]
+            for especie, habitat, poi_id in combinaciones
+        ]
+
+        def filtrar(query):
+            response = client.get(f"/fauna/getAllFauna?limit=1000&{query}")
+            assert response.status_code == 200
+            return [fauna["id"] for fauna in response.json()]
+
+        assert filtrar("especie=Ave filtro") == ids[:2]
+        assert filtrar("especie=Ave filtro&habitat=Humedal filtro") == ids[:1]
+        assert filtrar("habitat=Humedal filtro") == [ids[0], ids[2]]
+        assert filtrar(f"poi_id={poi_ids[0]}") == [ids[0], ids[2]]
+
+        statement = crud._filter_by(db.query(models.models.Fauna.id), models.models.Fauna, especie="Ave filtro", habitat="Humedal filtro").statement
+        compiled = statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+        plan = " ".join(str(row) for row in db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+        assert "ix_fauna_especie_habitat_id" in plan, f"La consulta no usa el índice compuesto: {plan}"
+        logger.info("✓ Filtros de fauna verificados")
+
+    @pytest.mark.it("Debe acotar los contadores de generación del cache en memoria")
+    def test_cache_counters_bounded(self):
+        """
+        ID de la prueba: FAUNA_CRUD_008
+        Descripción: Contadores de generación del MemoryCacheBackend
+        Entradas:
+            - Cache de 4 entradas y 100 ids invalidados
+        Resultados esperados:
+            - Nunca hay más contadores que max_entries
+            - El detalle cacheado de un id invalidado no vuelve a ser alcanzable
+              aunque su contador haya sido expulsado
+        """
+        from app.services.cacheService import CacheService, MemoryCacheBackend
+
+        cache = CacheService(MemoryCacheBackend(max_entries=4), ttl=60)
+        key = cache.detail_key("fauna", 1)
+        cache.store(key, b'{"id": 1}')
+        cache.invalidate("fauna", 1)
+        for fauna_id in range(2, 102):
+            cache.invalidate("fauna", fauna_id)
+        assert cache.backend.stats()["counters"] <= 4
+        assert cache.detail_key("fauna", 1) != key
+        assert cache.get(cache.detail_key("fauna", 1)) is None
+
+    @pytest.mark.it("Debe resolver los filtros de una columna con el orden del índice")
+    def test_single_filter_indexes(self, client, db):
+        """
+        ID de la prueba: FAUNA_CRUD_009
+        Descripción: Índices (especie, id) y (familia, id) para la paginación filtrada
+        Entradas:
+            - Página por cursor filtrada solo por especie y solo por familia
+        Resultados esperados:
+            - El plan usa el índice (columna, id) y no ordena en un B-tree temporal
+        """
+        from sqlalchemy import text
+        from app import crud
+
+        for model, column, index in [
+            (models.models.Fauna, "especie", "ix_fauna_especie_id"),
+            (models.models.Flora, "familia", "ix_flora_familia_id"),
+        ]:
+            query = crud._paginate(crud._filter_by(db.query(model.id, model.nombre_comun), model, **{column: "Ave"}), model.id, 0, 10, 5)
+            compiled = query.statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+            plan = " ".join(str(row) for row in db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+            assert index in plan, f"La consulta no usa {index}: {plan}"
+            assert "TEMP B-TREE" not in plan, f"La consulta ordena fuera del índice: {plan}"
@@ -1,6 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 import logging
 from main import app
@@ -26,6 +27,7 @@ def override_get_db():
         db.close()
 
 app.dependency_overrides[DatabaseService.get_db] = override_get_db
+app.dependency_overrides[DatabaseService.get_read_db] = override_get_db
 
 @pytest.fixture(scope="session")
 def db():
@@ -250,4 +252,232 @@ class TestFloraCrud:
 
         # Verify flora was deleted
         response = client.get(f"/flora/getFloraById/{flora_id}")
-        assert response.status_code == 404, "La flora no fue eliminada correctamente"
\ No newline at end of file
+        assert response.status_code == 404, "La flora no fue eliminada correctamente"
+    @pytest.mark.it("Debe paginar la flora con cursor")
+    def test_get_all_flora_cursor(self, client, db, sample_poi_data, sample_flora_data):
+        """
+        ID de la prueba: FLORA_CRUD_006
+        Descripción: Prueba de paginación por cursor (keyset) sobre la flora
+        Entradas:
+            - Varios registros de flora
+            - Cursor devuelto en la cabecera X-Next-Cursor
+            - Cursor mal formado
+        Acciones:
+            1. Crear flora suficiente para varias páginas
+            2. Recorrer las páginas siguiendo X-Next-Cursor
+            3. Enviar un cursor inválido
+        Resultados esperados:
+            - Las páginas no repiten registros y vienen ordenadas por id
+            - El recorrido con cursor coincide con el recorrido por offset
+            - Código 400 para cursor inválido
+        """
+        logger.info("\n=== Iniciando prueba de paginación por cursor ===")
+
+        poi_id = client.post("/poi/createPois", json=sample_poi_data).json()["id"]
+        sample_flora_data["poi_id"] = poi_id
+        for _ in range(5):
+            client.post("/flora/flora/", json=sample_flora_data)
+
+        offset_ids = [flora["id"] for flora in client.get("/flora/getAllFlora?skip=0&limit=1000").json()]
+
+        cursor_ids = []
+        url = "/flora/getAllFlora?limit=2"
+        while True:
+            response = client.get(url)
+            assert response.status_code == 200, "Error al paginar con cursor"
+            page = response.json()
+            assert len(page) <= 2, "La paginación excede el límite especificado"
+            cursor_ids += [flora["id"] for flora in page]
+            next_cursor = response.headers.get("X-Next-Cursor")
+            if not next_cursor:
+                break
+            url = f"/flora/getAllFlora?limit=2&cursor={next_cursor}"
+
+        assert cursor_ids == sorted(set(cursor_ids)), "Las páginas repiten registros o no están ordenadas"
+        assert cursor_ids == offset_ids, "El recorrido por cursor no coincide con el recorrido por offset"
+
+        response = client.get("/flora/getAllFlora?cursor=no-es-un-cursor")
+        assert response.status_code == 400, "Se esperaba error 400 para cursor inválido"
+
+    @pytest.mark.it("Debe crear flora en lote validando los POIs")
+    def test_create_flora_bulk(self, client, db, sample_poi_data, sample_flora_data):
+        """
+        ID de la prueba: FLORA_CRUD_007
+        Descripción: Prueba de creación de flora en lote
+        Entradas:
+            - Lote con flora válida y un elemento con POI inexistente
+        Acciones:
+            1. Enviar el lote sin modo parcial
+            2. Enviar el mismo lote con partial=true
+            3. Verificar los registros creados
+        Resultados esperados:
+            - Código 404 sin modo parcial y ningún registro creado
+            - Con partial=true se crean los válidos y se reporta el índice inválido
+        """
+        logger.info("\n=== Iniciando prueba de creación de flora en lote ===")
+
+        poi_id = client.post("/poi/createPois", json=sample_poi_data).json()["id"]
+        lote = [
+            {**sample_flora_data, "poi_id": poi_id, "nombre_comun": "Dalia 1"},
+            {**sample_flora_data, "poi_id": 999999, "nombre_comun": "Dalia huérfana"},
+            {**sample_flora_data, "poi_id": poi_id, "nombre_comun": "Dalia 2"},
+        ]
+
+        total = len(client.get("/flora/getAllFlora?limit=1000").json())
+        response = client.post("/flora/bulk", json=lote)
+        assert response.status_code == 404, "Se esperaba error 404 para POI no existente"
+        assert response.json()["detail"][0]["index"] == 1
+        assert len(client.get("/flora/getAllFlora?limit=1000").json()) == total, "Se creó flora sin modo parcial"
+
+        response = client.post("/flora/bulk?partial=true", json=lote)
+        assert response.status_code == 200, "Error al crear flora en lote"
+        result = response.json()
+        assert [flora["nombre_comun"] for flora in result["created"]] == ["Dalia 1", "Dalia 2"]
+        assert [error["index"] for error in result["errors"]] == [1]
+
+        for flora in result["created"]:
+            response = client.get(f"/flora/getFloraById/{flora['id']}")
+            assert response.status_code == 200, "Error al obtener flora creada en lote"
+
+    @pytest.mark.it("Debe limitar la respuesta y el SELECT a los campos pedidos")
+    def test_flora_sparse_fields(self, client, db, sample_poi_data, sample_flora_data):
+        """
+        ID de la prueba: FLORA_CRUD_008
+        Descripción: Parámetro fields= en getAllFlora y getFloraById
+        Entradas:
+            - Una flora con foto del pipeline de imágenes
+            - fields=nombre_comun,foto_variantes y un campo inexistente
+        Resultados esperados:
+            - La respuesta solo trae id y los campos pedidos
+            - El SELECT no lee las columnas no pedidas
+            - Código 400 para un campo desconocido
+        """
+        logger.info("\n=== Iniciando prueba de campos parciales ===")
+
+        poi_id = client.post("/poi/createPois", json=sample_poi_data).json()["id"]
+        foto = "https://storage.googleapis.com/bucket/images/abc/original.jpg"
+        flora_id = client.post("/flora/flora/", json={**sample_flora_data, "poi_id": poi_id, "foto_url": foto}).json()["id"]
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(Engine, "before_cursor_execute", listener)
+        try:
+            response = client.get("/flora/getAllFlora?limit=1000&fields=nombre_comun,foto_variantes")
+        finally:
+            event.remove(Engine, "before_cursor_execute", listener)
+        assert response.status_code == 200
+        flora = next(item for item in response.json() if item["id"] == flora_id)
+        assert flora == {"id": flora_id, "nombre_comun": sample_flora_data["nombre_comun"], "foto_variantes": {
+            "medium": "https://storage.googleapis.com/bucket/images/abc/medium.webp",
+            "thumb": "https://storage.googleapis.com/bucket/images/abc/thumb.webp",
+        }}
+        select_sql = next(statement for statement in statements if statement.lstrip().upper().startswith("SELECT"))
+        assert "familia" not in select_sql and "nombre_cientifico" not in select_sql
+
+        response = client.get(f"/flora/getFloraById/{flora_id}?fields=familia")
+        assert response.json() == {"id": flora_id, "familia": sample_flora_data["familia"]}
+
+        response = client.get("/flora/getAllFlora?fields=nombre_comun,altura")
+        assert response.status_code == 400, "Se esperaba error 400 para un campo desconocido"
+        assert "altura" in response.json()["detail"]
+
+    @pytest.mark.it("Debe filtrar flora por familia y POI")
+    def test_flora_filters(self, client, db, sample_poi_data, sample_flora_data):
+        """
+        ID de la prueba: FLORA_CRUD_009
+        Descripción: Filtros familia y poi_id en getAllFlora
+        Entradas:
+            - Orquídeas y dalias repartidas en dos POIs
+        Resultados esperados:
+            - familia y poi_id combinados devuelven solo las orquídeas del POI
+        """
+        logger.info("\n=== Iniciando prueba de filtros de flora ===")
+
+        poi_ids = [client.post("/poi/createPois", json=sample_poi_data).json()["id"] for _ in range(2)]
+        creadas = [
+            client.post("/flora/flora/", json={**sample_flora_data, "familia": familia, "poi_id": poi_id}).json()["id"]
+            for familia, poi_id in [("Orchidaceae", poi_ids[0]), ("Asteraceae", poi_ids[0]), ("Orchidaceae", poi_ids[1])]
+        ]
+
+        response = client.get(f"/flora/getAllFlora?limit=1000&familia=Orchidaceae&poi_id={poi_ids[0]}")
+        assert response.status_code == 200
+        assert [flora["id"] for flora in response.json()] == creadas[:1]
+        assert [flora["id"] for flora in client.get(f"/flora/getAllFlora?limit=1000&poi_id={poi_ids[1]}").json()] == creadas[2:]
+
+    @pytest.mark.it("Debe crear flora validando el POI en una sola sentencia")
+    def test_create_flora_single_statement(self, client, db, sample_poi_data, sample_flora_data):
+        """
+        ID de la prueba: FLORA_CRUD_010
+        Descripción: Creación de flora con INSERT ... SELECT ... RETURNING
+        Entradas:
+            - Flora asociada a un POI existente y a un POI inexistente
+        Resultados esperados:
+            - Una sola sentencia SQL (el INSERT) por creación
+            - La respuesta trae la fila creada y la columna de búsqueda se calcula
+            - Código 404 sin insertar nada cuando el POI no existe
+        """
+        logger.info("\n=== Iniciando prueba de creación en una sentencia ===")
+
+        poi_id = client.post("/poi/createPois", json=sample_poi_data).json()["id"]
+        data = {**sample_flora_data, "nombre_comun": "Dália Escarlata Única", "poi_id": poi_id}
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(Engine, "before_cursor_execute", listener)
+        try:
+            response = client.post("/flora/flora/", json=data)
+        finally:
+            event.remove(Engine, "before_cursor_execute", listener)
+        assert response.status_code == 200, "Error al crear flora"
+        assert len(statements) == 1 and statements[0].lstrip().upper().startswith("INSERT")
+        created = response.json()
+        for key in ["nombre_cientifico", "nombre_comun", "familia", "foto_url", "poi_id"]:
+            assert created[key] == data[key], f"El campo {key} no coincide"
+        # La columna de búsqueda se calcula aunque el INSERT no use los defaults del modelo
+        resultados = client.get("/search?q=dalia escarlata unica").json()
+        assert [(item["entidad"], item["id"]) for item in resultados] == [("flora", created["id"])]
+
+        response = client.post("/flora/flora/", json={**data, "poi_id": 999999})
+        assert response.status_code == 404, "Se esperaba error 404 para un POI inexistente"
+        assert response.json()["detail"] == "No se encontro el Punto de interes con el id 999999"
+        assert client.get("/search?q=dalia escarlata unica").json() == resultados
+
+    @pytest.mark.it("Debe reportar por elemento los errores de validación en modo parcial")
+    def test_bulk_partial_validation(self, client, db, sample_poi_data, sample_flora_data):
+        """
+        ID de la prueba: FLORA_CRUD_011
+        Descripción: Validación por elemento en /flora/bulk y /poi/bulk con partial=true
+        Entradas:
+            - Lote de flora con un elemento sin campos obligatorios y otro con POI inexistente
+            - Lote de POIs con un elemento inválido
+        Resultados esperados:
+            - Sin modo parcial el lote completo responde 422 con el índice del elemento
+            - Con partial=true se crean los válidos y cada error trae su índice y detalle
+        """
+        logger.info("\n=== Iniciando prueba de validación parcial en lote ===")
+
+        poi_id = client.post("/poi/createPois", json=sample_poi_data).json()["id"]
+        lote = [
+            {**sample_flora_data, "poi_id": poi_id, "nombre_comun": "Válida"},
+            {"nombre_comun": "Sin familia", "poi_id": poi_id},
+            {**sample_flora_data, "poi_id": 999999},
+            "no es un objeto",
+        ]
+        response = client.post("/flora/bulk", json=lote)
+        assert response.status_code == 422, "Se esperaba error 422 sin modo parcial"
+        assert {error["loc"][1] for error in response.json()["detail"]} == {1, 3}
+
+        response = client.post("/flora/bulk?partial=true", json=lote)
+        assert response.status_code == 200, "Error al crear flora en lote parcial"
+        result = response.json()
+        assert [flora["nombre_comun"] for flora in result["created"]] == ["Válida"]
+        assert [error["index"] for error in result["errors"]] == [1, 2, 3]
+        assert "familia" in result["errors"][0]["detail"]
+        assert "999999" in result["errors"][1]["detail"]
+
+        pois = [{**sample_poi_data, "nombre": "POI parcial"}, {"nombre": "POI incompleto"}]
+        assert client.post("/poi/bulk", json=pois).status_code == 422
+        response = client.post("/poi/bulk?partial=true", json=pois)
+        assert response.status_code == 200
+        assert [poi["nombre"] for poi in response.json()["created"]] == ["POI parcial"]
+        assert [error["index"] for error in response.json()["errors"]] == [1]
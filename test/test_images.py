@@ -0,0 +1,217 @@
+import asyncio
+import io
+import os
+import pytest
+from PIL import Image
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+from starlette.datastructures import Headers
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import logging
+from main import app
+from app.database import Base
+from app.services.databaseService import DatabaseService
+from app.services.imageService import IMAGE_VARIANTS
+from app.services.storageService import MAX_CONCURRENT_UPLOADS, ContentIndex, LocalStorageBackend, storage_service
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Create test database engine
+SQLALCHEMY_DATABASE_URL = "sqlite:///./testdb.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+# Create TestingSessionLocal class
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+Base.metadata.create_all(bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[DatabaseService.get_db] = override_get_db
+app.dependency_overrides[DatabaseService.get_read_db] = override_get_db
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+class CountingBackend(LocalStorageBackend):
+    """
+    Local backend that counts how many files are actually written
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.saves = 0
+
+    def save(self, fileobj, name, content_type):
+        self.saves += 1
+        return super().save(fileobj, name, content_type)
+
+@pytest.fixture
+def local_storage(tmp_path):
+    """
+    Fixture that points uploads to a temporary directory and an empty
+    in-memory content index instead of Firebase
+    """
+    previous = (storage_service._backend, storage_service._index)
+    backend = CountingBackend(root=str(tmp_path), base_url="/media")
+    storage_service.configure(backend, ContentIndex(":memory:"))
+    try:
+        yield backend
+    finally:
+        storage_service.configure(*previous)
+
+@pytest.mark.describe("Suite de pruebas de subida de imágenes")
+class TestImages:
+
+    @pytest.mark.it("Debe subir una imagen al almacenamiento local")
+    def test_upload_local(self, client, local_storage):
+        """
+        ID de la prueba: IMAGES_001
+        Descripción: Subida de imagen con el backend de disco local
+        Entradas:
+            - Archivo image/png de 3 MB (mayor que un bloque de subida)
+        Resultados esperados:
+            - status success y URL bajo /media
+            - El archivo guardado es idéntico al enviado
+        """
+        logger.info("\n=== Iniciando prueba de subida local ===")
+
+        content = os.urandom(3 * 1024 * 1024)
+        response = client.post("/images/upload", files={"file": ("planta.png", content, "image/png")})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["status"] == "success", body
+        assert body["url"].startswith("/media/") and body["url"].endswith(".png")
+        # Pillow no puede decodificarlo: se guarda solo el original
+        assert set(body["variants"]) == {"original"}
+
+        stored = os.path.join(local_storage.root, body["url"][len("/media/"):])
+        with open(stored, "rb") as f:
+            assert f.read() == content, "El archivo guardado no coincide"
+
+    @pytest.mark.it("Debe generar miniatura y tamaño medio en WebP")
+    def test_upload_variants(self, client, local_storage):
+        """
+        ID de la prueba: IMAGES_003
+        Descripción: Derivados generados en el pool de procesos al subir
+        Entradas:
+            - Imagen JPEG de 2000x1500
+        Resultados esperados:
+            - URLs de original, medium y thumb
+            - Derivados WebP cuyo lado mayor no supera el tamaño configurado
+            - foto_variantes de la flora apunta a los mismos derivados
+        """
+        logger.info("\n=== Iniciando prueba de derivados de imagen ===")
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (2000, 1500), (34, 139, 34)).save(buffer, "JPEG")
+        response = client.post("/images/upload", files={"file": ("bosque.jpg", buffer.getvalue(), "image/jpeg")})
+        body = response.json()
+        assert body["status"] == "success", body
+        assert set(body["variants"]) == {"original", *IMAGE_VARIANTS}
+
+        for name, max_side in IMAGE_VARIANTS.items():
+            path = os.path.join(local_storage.root, body["variants"][name][len("/media/"):])
+            with Image.open(path) as variant:
+                assert variant.format == "WEBP"
+                assert max(variant.size) == max_side, f"Tamaño incorrecto para {name}"
+
+        poi_id = client.post("/poi/createPois", json={
+            "nombre": "Bosque de niebla",
+            "descripcion": "Reserva",
+            "foto_url": body["url"],
+            "tipo": "Natural",
+            "longitud": -75.6,
+            "latitud": 6.2
+        }).json()["id"]
+        flora = client.post("/flora/flora/", json={
+            "nombre_cientifico": "Quercus humboldtii",
+            "nombre_comun": "Roble andino",
+            "familia": "Fagaceae",
+            "foto_url": body["url"],
+            "poi_id": poi_id
+        }).json()
+        expected = {name: url for name, url in body["variants"].items() if name != "original"}
+        assert flora["foto_variantes"] == expected
+        assert client.get(f"/poi/getPoiById/{poi_id}").json()["foto_variantes"] == expected
+
+    @pytest.mark.it("Debe reutilizar el contenido ya subido sin volver a enviarlo")
+    def test_upload_deduplicated(self, client, local_storage):
+        """
+        ID de la prueba: IMAGES_004
+        Descripción: Deduplicación por hash del contenido
+        Entradas:
+            - La misma imagen subida dos veces
+            - Una imagen distinta
+        Resultados esperados:
+            - La segunda subida devuelve las mismas URLs sin escribir archivos
+            - Con el índice local vacío, la existencia se comprueba en el backend
+            - Una imagen distinta produce URLs distintas
+        """
+        logger.info("\n=== Iniciando prueba de deduplicación ===")
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (640, 480), (200, 30, 30)).save(buffer, "PNG")
+        content = buffer.getvalue()
+
+        first = client.post("/images/upload", files={"file": ("a.png", content, "image/png")}).json()
+        saves = local_storage.saves
+        assert saves == 1 + len(IMAGE_VARIANTS)
+
+        second = client.post("/images/upload", files={"file": ("b.png", content, "image/png")}).json()
+        assert second["variants"] == first["variants"]
+        assert local_storage.saves == saves, "Se volvió a enviar contenido duplicado"
+
+        storage_service.configure(local_storage, ContentIndex(":memory:"))
+        third = client.post("/images/upload", files={"file": ("c.png", content, "image/png")}).json()
+        assert third["variants"] == first["variants"]
+        assert local_storage.saves == saves
+
+        buffer = io.BytesIO()
+        Image.new("RGB", (640, 480), (30, 30, 200)).save(buffer, "PNG")
+        other = client.post("/images/upload", files={"file": ("d.png", buffer.getvalue(), "image/png")}).json()
+        assert other["url"] != first["url"]
+
+    @pytest.mark.it("Debe rechazar archivos que no son imágenes")
+    def test_upload_rejects_non_image(self, client, local_storage):
+        """
+        ID de la prueba: IMAGES_002
+        Descripción: Validación del tipo de contenido
+        Entradas:
+            - Archivo text/plain
+        Resultados esperados:
+            - status error y ningún archivo guardado
+        """
+        response = client.post("/images/upload", files={"file": ("notas.txt", b"hola", "text/plain")})
+        assert response.json()["status"] == "error"
+        assert os.listdir(local_storage.root) == []
+
+    @pytest.mark.it("Debe aceptar subidas concurrentes desde distintos event loops")
+    def test_upload_several_loops(self, local_storage):
+        """
+        ID de la prueba: IMAGES_005
+        Descripción: Límite de subidas concurrentes con más de un event loop
+        Entradas:
+            - Dos event loops sucesivos, cada uno con más subidas que MAX_CONCURRENT_UPLOADS
+        Resultados esperados:
+            - Todas las subidas de ambos loops terminan con su URL
+        """
+        async def upload_batch():
+            files = [
+                UploadFile(io.BytesIO(os.urandom(1024)), filename=f"{index}.png", headers=Headers({"content-type": "image/png"}))
+                for index in range(MAX_CONCURRENT_UPLOADS * 2)
+            ]
+            return await asyncio.gather(*(storage_service.upload_image(file) for file in files))
+
+        for _ in range(2):
+            results = asyncio.run(upload_batch())
+            assert all(urls["original"].startswith("/media/") for urls in results)
@@ -0,0 +1,118 @@
+import logging
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from main import app
+from app.database import Base
+from app.services.databaseService import DatabaseService
+from app.services.cacheService import cache_service
+from app.services.metricsService import metrics_service
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Create test database engine
+SQLALCHEMY_DATABASE_URL = "sqlite:///./testdb.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+# Create TestingSessionLocal class
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+Base.metadata.create_all(bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[DatabaseService.get_db] = override_get_db
+app.dependency_overrides[DatabaseService.get_read_db] = override_get_db
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+@pytest.fixture(scope="module")
+def poi_id():
+    """
+    POI para las peticiones medidas
+    """
+    client = TestClient(app)
+    return client.post("/poi/createPois", json={
+        "nombre": "Laguna de Guatavita",
+        "descripcion": "Laguna sagrada",
+        "foto_url": "http://ejemplo.com/guatavita.jpg",
+        "tipo": "Natural",
+        "longitud": -73.7775,
+        "latitud": 4.9783
+    }).json()["id"]
+
+@pytest.mark.describe("Suite de pruebas de métricas e instrumentación")
+class TestMetrics:
+
+    @pytest.mark.it("Debe añadir Server-Timing con el tiempo y número de consultas")
+    def test_server_timing(self, client, poi_id):
+        """
+        ID de la prueba: METRICS_001
+        Descripción: Cabecera Server-Timing por petición
+        Entradas:
+            - GET /poi/getPoiById con flora y fauna
+        Resultados esperados:
+            - Fases db (con el número de consultas), serialize y total
+        """
+        logger.info("\n=== Iniciando prueba de Server-Timing ===")
+
+        cache_service.clear()
+        response = client.get(f"/poi/getPoiById/{poi_id}")
+        assert response.status_code == 200
+        phases = {part.split(";")[0].strip(): part for part in response.headers["server-timing"].split(",")}
+        assert 'desc="3 queries"' in phases["db"], "Se esperaban 3 consultas (POI, flora y fauna)"
+        assert "serialize" in phases and "total" in phases
+
+    @pytest.mark.it("Debe exponer métricas por ruta en formato Prometheus")
+    def test_metrics_endpoint(self, client, poi_id):
+        """
+        ID de la prueba: METRICS_002
+        Descripción: /metrics publica contadores e histogramas por plantilla de ruta
+        Resultados esperados:
+            - http_requests_total y el histograma de latencia etiquetados con la ruta
+            - Consultas SQL por ruta y estadísticas del pool
+        """
+        client.get(f"/poi/getPoiById/{poi_id}")
+        client.get("/ruta/inexistente")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'http_requests_total{method="GET",route="/poi/getPoiById/{poi_id}",status="200"}' in body
+        assert 'http_request_duration_seconds_bucket{method="GET",route="/poi/getPoiById/{poi_id}",le="+Inf"}' in body
+        assert 'route="<unmatched>",status="404"' in body
+        assert 'http_request_db_queries_total{method="POST",route="/poi/createPois"}' in body
+        assert "db_query_duration_seconds_count" in body
+        assert 'db_pool_checkouts_total{pool="sync"}' in body
+
+    @pytest.mark.it("Debe registrar las peticiones lentas con su SQL")
+    def test_slow_request_log(self, client, poi_id, caplog):
+        """
+        ID de la prueba: METRICS_003
+        Descripción: Log de peticiones lentas
+        Entradas:
+            - Umbral de peticiones lentas mínimo
+        Resultados esperados:
+            - Un WARNING con la ruta y las sentencias SQL ejecutadas
+        """
+        cache_service.clear()
+        previous = metrics_service.slow_request_seconds
+        metrics_service.slow_request_seconds = 1e-9
+        try:
+            with caplog.at_level(logging.WARNING, logger="botanicmap.slow_requests"):
+                client.get("/poi/getAllPois?limit=5")
+        finally:
+            metrics_service.slow_request_seconds = previous
+        messages = [record.getMessage() for record in caplog.records if record.name == "botanicmap.slow_requests"]
+        assert any("/poi/getAllPois" in message and "SELECT" in message for message in messages)
@@ -0,0 +1,111 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect, select
+import logging
+from main import app
+from app import migrations
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+@pytest.fixture
+def fresh_engine(tmp_path):
+    """
+    Engine sobre una base SQLite vacía
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+@pytest.mark.describe("Suite de pruebas de migraciones y arranque")
+class TestMigrations:
+
+    @pytest.mark.it("Debe crear el esquema y marcarlo en la última versión")
+    def test_upgrade_fresh_database(self, fresh_engine):
+        """
+        ID de la prueba: MIGRATIONS_001
+        Descripción: upgrade sobre una base vacía y comprobación de versión
+        Resultados esperados:
+            - Antes: todas las migraciones pendientes
+            - Después: tablas creadas, versión igual a la última y nada pendiente
+            - Un segundo upgrade no aplica nada
+        """
+        logger.info("\n=== Iniciando prueba de migraciones ===")
+
+        latest = migrations.latest_version()
+        assert latest >= 2
+        assert migrations.check(fresh_engine)["pending"] == [version for version, _ in migrations.available_migrations()]
+
+        assert migrations.upgrade(fresh_engine) == list(range(1, latest + 1))
+        tables = inspect(fresh_engine).get_table_names()
+        assert {"puntos_de_interes", "flora", "fauna", migrations.VERSION_TABLE} <= set(tables)
+
+        status = migrations.check(fresh_engine)
+        assert status["current"] == latest and status["pending"] == []
+        assert migrations.upgrade(fresh_engine) == []
+
+    @pytest.mark.it("Debe marcar versiones aplicadas a mano y separar sentencias SQL")
+    def test_stamp_and_split(self, fresh_engine):
+        """
+        ID de la prueba: MIGRATIONS_002
+        Descripción: stamp y lectura de los archivos SQL
+        Resultados esperados:
+            - stamp 1 deja pendientes solo las versiones posteriores
+            - Cada archivo se divide en sentencias sin comentarios
+        """
+        migrations.stamp(fresh_engine, 1)
+        assert migrations.check(fresh_engine)["current"] == 1
+        assert 1 not in migrations.check(fresh_engine)["pending"]
+
+        statements = migrations.split_statements("-- comentario\nCREATE TABLE a (x int);\nINSERT INTO a\n  VALUES (1);\n")
+        assert statements == ["CREATE TABLE a (x int)", "INSERT INTO a\n  VALUES (1)"]
+
+    @pytest.mark.it("Debe exponer el desglose del arranque")
+    def test_startup_breakdown(self):
+        """
+        ID de la prueba: MIGRATIONS_003
+        Descripción: /healthCheck/startup con los tiempos del arranque
+        Resultados esperados:
+            - Fases import y ready en milisegundos
+        """
+        with TestClient(app) as client:
+            response = client.get("/healthCheck/startup")
+        assert response.status_code == 200
+        assert {"import", "ready"} <= set(response.json())
+
+    @pytest.mark.it("Debe recalcular las columnas de búsqueda con search_key")
+    def test_backfill_search_columns(self, fresh_engine):
+        """
+        ID de la prueba: MIGRATIONS_004
+        Descripción: Paso Python de la migración 0002
+        Entradas:
+            - POI y flora con columnas de búsqueda como las dejaba lower(unaccent(x))
+        Resultados esperados:
+            - Las columnas quedan igual que models.search_key (tildes, mayúsculas y espacios)
+            - La migración 0002 tiene registrado el paso
+        """
+        from app.database import Base
+        from app.models.models import Flora, POI
+
+        Base.metadata.create_all(bind=fresh_engine)
+        with fresh_engine.begin() as connection:
+            poi_id = connection.execute(POI.__table__.insert().values(
+                nombre="  Jardín   Botánico ", nombre_busqueda="  jardin   botanico ",
+                descripcion="d", foto_url="f", tipo="t", latitud=4.6, longitud=-74.1,
+            )).inserted_primary_key[0]
+            connection.execute(Flora.__table__.insert().values(
+                nombre_cientifico="Cattleya  trianae", nombre_cientifico_busqueda="cattleya  trianae",
+                nombre_comun="Flor de Mayo ", nombre_comun_busqueda="flor de mayo ",
+                familia="Orchidaceae", foto_url="f", poi_id=poi_id,
+            ))
+            migrations.backfill_search_columns(connection)
+
+        with fresh_engine.connect() as connection:
+            assert connection.execute(select(POI.nombre_busqueda)).scalar() == "jardin botanico"
+            assert connection.execute(select(Flora.nombre_cientifico_busqueda, Flora.nombre_comun_busqueda)).one() == (
+                "cattleya trianae", "flor de mayo",
+            )
+        assert migrations.PYTHON_STEPS[2] is migrations.backfill_search_columns
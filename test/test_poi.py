@@ -1,6 +1,8 @@
 import pytest
+import math
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 import logging
 from main import app
@@ -30,6 +32,7 @@ def override_get_db():
         db.close()
 
 app.dependency_overrides[DatabaseService.get_db] = override_get_db
+app.dependency_overrides[DatabaseService.get_read_db] = override_get_db
 
 client = TestClient(app)
 
@@ -93,9 +96,12 @@ class TestPOICrud:
         retrieved_poi = response.json()
         
         # Verificaciones detalladas
-        for key in ["nombre", "descripcion", "foto_url", "tipo", "longitud", "latitud"]:
+        for key in ["nombre", "descripcion", "foto_url", "tipo"]:
             assert retrieved_poi[key] == sample_poi_data[key], f"El campo {key} no coincide"
             logger.info(f"✓ Campo {key} verificado correctamente")
+        for key in ["longitud", "latitud"]:
+            assert retrieved_poi[key] == float(sample_poi_data[key]), f"El campo {key} no coincide"
+            logger.info(f"✓ Campo {key} verificado correctamente")
 
         logger.info("=== Prueba de creación y lectura completada exitosamente ===\n")
 
@@ -199,4 +205,400 @@ class TestPOICrud:
         assert response.status_code == 404, "El POI no fue eliminado correctamente"
         logger.info("✓ Se confirmó que el POI fue eliminado")
 
-        logger.info("=== Prueba de eliminación completada exitosamente ===\n")
\ No newline at end of file
+        logger.info("=== Prueba de eliminación completada exitosamente ===\n")
+
+    @pytest.mark.it("Debe omitir flora y fauna cuando include_children es falso")
+    def test_get_pois_without_children(self, client, db, sample_poi_data):
+        """
+        ID de la prueba: POI_CRUD_006
+        Descripción: Obtener POIs sin cargar las colecciones anidadas
+        """
+        logger.info("\n=== Iniciando prueba de POIs sin flora ni fauna ===")
+
+        response = client.post("/poi/createPois", json=sample_poi_data)
+        assert response.status_code == 200, "Error al crear POI"
+        poi_id = response.json()["id"]
+
+        response = client.get("/poi/getAllPois?limit=5&include_children=false")
+        assert response.status_code == 200, "Error al obtener POIs sin hijos"
+        for poi in response.json():
+            assert "flora" not in poi and "fauna" not in poi, "La respuesta incluye colecciones anidadas"
+
+        response = client.get(f"/poi/getPoiById/{poi_id}?include_children=false")
+        assert response.status_code == 200, "Error al obtener POI sin hijos"
+        assert "flora" not in response.json(), "La respuesta incluye flora"
+        logger.info("✓ Colecciones anidadas omitidas correctamente")
+
+    @pytest.mark.it("Debe cargar flora y fauna con un número constante de consultas")
+    def test_get_pois_constant_queries(self, client, db, sample_poi_data):
+        """
+        ID de la prueba: POI_CRUD_007
+        Descripción: La lista de POIs no debe lanzar una consulta por cada POI (N+1)
+        """
+        logger.info("\n=== Iniciando prueba de consultas N+1 ===")
+
+        for _ in range(3):
+            response = client.post("/poi/createPois", json=sample_poi_data)
+            poi_id = response.json()["id"]
+            client.post("/flora/flora/", json={
+                "nombre_cientifico": "Dahlia coccinea",
+                "nombre_comun": "Dalia",
+                "familia": "Asteraceae",
+                "foto_url": "http://ejemplo.com/dalia.jpg",
+                "poi_id": poi_id
+            })
+
+        statements = []
+        def count_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(Engine, "before_cursor_execute", count_statement)
+        try:
+            response = client.get("/poi/getAllPois?skip=0&limit=50")
+        finally:
+            event.remove(Engine, "before_cursor_execute", count_statement)
+
+        assert response.status_code == 200, "Error al obtener POIs"
+        assert len(response.json()) >= 3
+        # Una consulta para la página y una por cada relación
+        assert 0 < len(statements) <= 3, f"Se ejecutaron {len(statements)} consultas"
+        logger.info(f"✓ Se ejecutaron {len(statements)} consultas")
+
+    @pytest.mark.it("Debe encontrar POIs cercanos y dentro de un rectángulo")
+    def test_spatial_queries(self, client, db, sample_poi_data):
+        """
+        ID de la prueba: POI_CRUD_008
+        Descripción: Consultas espaciales /poi/nearby y /poi/bbox
+        """
+        logger.info("\n=== Iniciando prueba de consultas espaciales ===")
+
+        cerca = {**sample_poi_data, "latitud": 4.6097, "longitud": -74.0817}
+        lejos = {**sample_poi_data, "latitud": 6.2442, "longitud": -75.5812}
+        cerca_id = client.post("/poi/createPois", json=cerca).json()["id"]
+        lejos_id = client.post("/poi/createPois", json=lejos).json()["id"]
+
+        response = client.get("/poi/nearby?lat=4.61&lon=-74.08&radius=2000")
+        assert response.status_code == 200, "Error en la consulta nearby"
+        ids = [poi["id"] for poi in response.json()]
+        assert cerca_id in ids and lejos_id not in ids, "Resultados de cercanía incorrectos"
+        assert all(poi["distancia"] <= 2000 for poi in response.json())
+
+        response = client.get("/poi/bbox?min_lat=4&min_lon=-76&max_lat=7&max_lon=-74")
+        assert response.status_code == 200, "Error en la consulta bbox"
+        ids = [poi["id"] for poi in response.json()]
+        assert cerca_id in ids and lejos_id in ids, "Resultados del rectángulo incorrectos"
+
+        # Un POI eliminado desaparece del índice
+        client.delete(f"/poi/deletePoisById/{cerca_id}")
+        response = client.get("/poi/nearby?lat=4.61&lon=-74.08&radius=2000")
+        assert cerca_id not in [poi["id"] for poi in response.json()]
+
+        response = client.get("/poi/bbox?min_lat=7&min_lon=-76&max_lat=4&max_lon=-74")
+        assert response.status_code == 400, "Se esperaba error 400 para un rectángulo inválido"
+        logger.info("✓ Consultas espaciales verificadas")
+
+    @pytest.mark.it("Debe crear POIs en lote")
+    def test_create_pois_bulk(self, client, db, sample_poi_data):
+        """
+        ID de la prueba: POI_CRUD_009
+        Descripción: Crear varios POIs con una sola petición
+        """
+        logger.info("\n=== Iniciando prueba de creación de POIs en lote ===")
+
+        lote = [{**sample_poi_data, "nombre": f"POI en lote {i}"} for i in range(3)]
+        response = client.post("/poi/bulk", json=lote)
+        assert response.status_code == 200, "Error al crear POIs en lote"
+        created = response.json()["created"]
+        assert [poi["nombre"] for poi in created] == [poi["nombre"] for poi in lote]
+
+        for poi in created:
+            response = client.get(f"/poi/getPoiById/{poi['id']}")
+            assert response.status_code == 200, "Error al obtener POI creado en lote"
+
+        response = client.post("/poi/bulk", json=[{"nombre": "POI Incompleto"}])
+        assert response.status_code == 422, "Se esperaba error 422 para datos inválidos"
+        logger.info("✓ Creación en lote verificada")
+
+    @pytest.mark.it("Debe agrupar POIs en clusters por zoom")
+    def test_poi_clusters(self, client, db, sample_poi_data):
+        """
+        ID de la prueba: POI_CRUD_010
+        Descripción: Clusters /poi/clusters mantenidos al crear y eliminar
+        Entradas:
+            - Tres POIs a pocos metros entre sí y uno lejano, en una zona sin otros POIs
+        Resultados esperados:
+            - Con zoom bajo los tres cercanos forman un cluster con su centroide
+            - Con zoom alto cada POI es un cluster de 1 con su id
+            - Al eliminar un POI la cantidad del cluster baja
+            - Código 400 para un bbox mal formado
+        """
+        logger.info("\n=== Iniciando prueba de clusters ===")
+
+        coordenadas = [(-60.001, 100.001), (-60.002, 100.002), (-60.003, 100.003), (-55.5, 110.5)]
+        ids = [
+            client.post("/poi/createPois", json={**sample_poi_data, "latitud": lat, "longitud": lon}).json()["id"]
+            for lat, lon in coordenadas
+        ]
+
+        response = client.get("/poi/clusters?bbox=95,-65,115,-50&zoom=6")
+        assert response.status_code == 200, "Error en la consulta de clusters"
+        clusters = sorted(response.json(), key=lambda cluster: -cluster["cantidad"])
+        assert [cluster["cantidad"] for cluster in clusters] == [3, 1]
+        assert clusters[0]["id"] is None and clusters[1]["id"] == ids[3]
+        assert abs(clusters[0]["latitud"] - (-60.002)) < 1e-6 and abs(clusters[0]["longitud"] - 100.002) < 1e-6
+
+        response = client.get("/poi/clusters?bbox=99.9,-60.1,100.1,-59.9&zoom=18")
+        assert sorted(cluster["id"] for cluster in response.json()) == ids[:3]
+
+        client.delete(f"/poi/deletePoisById/{ids[0]}")
+        response = client.get("/poi/clusters?bbox=95,-65,115,-50&zoom=6")
+        assert sorted(cluster["cantidad"] for cluster in response.json()) == [1, 2]
+
+        response = client.get("/poi/clusters?bbox=95,-65,115&zoom=6")
+        assert response.status_code == 400, "Se esperaba error 400 para un bbox mal formado"
+        logger.info("✓ Clusters verificados")
+
+    @pytest.mark.it("Debe servir teselas MessagePack de POIs e invalidarlas al cambiar")
+    def test_poi_tiles(self, client, db, sample_poi_data):
+        """
+        ID de la prueba: POI_CRUD_011
+        Descripción: Teselas /poi/tiles/{z}/{x}/{y} con id, coordenadas, tipo y nombre
+        Entradas:
+            - Dos POIs en la misma tesela de zoom 12, en una zona sin otros POIs
+        Resultados esperados:
+            - La tesela se responde en MessagePack con ambos POIs
+            - Un POI creado o eliminado después se refleja en la tesela cacheada
+            - Código 400 para una tesela fuera de rango
+        """
+        from app.services.spatialIndexService import mercator
+        from app.services.tileService import TILE_MEDIA_TYPE, tile_service
+
+        logger.info("\n=== Iniciando prueba de teselas ===")
+
+        z = 12
+        x, y = (int(value * (1 << z)) for value in mercator(-45.001, 60.001))
+        url = f"/poi/tiles/{z}/{x}/{y}"
+        ids = [
+            client.post("/poi/createPois", json={**sample_poi_data, "latitud": lat, "longitud": lon}).json()["id"]
+            for lat, lon in [(-45.001, 60.001), (-45.002, 60.002)]
+        ]
+
+        response = client.get(url)
+        assert response.status_code == 200, "Error en la consulta de la tesela"
+        assert response.headers["content-type"] == TILE_MEDIA_TYPE
+        pois = tile_service.decode(response.content)
+        assert [poi["id"] for poi in pois] == ids
+        assert pois[0]["nombre"] == sample_poi_data["nombre"] and pois[0]["tipo"] == sample_poi_data["tipo"]
+        assert abs(pois[0]["latitud"] - (-45.001)) < 1e-4 and abs(pois[0]["longitud"] - 60.001) < 1e-4
+
+        nuevo = client.post("/poi/createPois", json={**sample_poi_data, "latitud": -45.003, "longitud": 60.003}).json()["id"]
+        client.delete(f"/poi/deletePoisById/{ids[0]}")
+        pois = tile_service.decode(client.get(url).content)
+        assert [poi["id"] for poi in pois] == [ids[1], nuevo], "La tesela cacheada no se invalidó"
+
+        response = client.get(f"/poi/tiles/{z}/{1 << z}/0")
+        assert response.status_code == 400, "Se esperaba error 400 para una tesela fuera de rango"
+        logger.info("✓ Teselas verificadas")
+
+    @pytest.mark.it("Debe producir en la ruta rápida el mismo JSON que el response_model")
+    def test_list_fast_path_matches_schema(self, client, db, sample_poi_data):
+        """
+        ID de la prueba: POI_CRUD_012
+        Descripción: getAllPois serializado desde filas de columnas con orjson
+        Entradas:
+            - Un POI con una flora y una fauna cuya foto viene del pipeline de imágenes
+        Resultados esperados:
+            - Con y sin hijos, la página coincide con la serialización Pydantic de los objetos ORM
+            - foto_variantes se calcula también en la ruta rápida
+        """
+        from pydantic import TypeAdapter
+        from app.models.models import POI
+
+        logger.info("\n=== Iniciando prueba de la ruta rápida de listas ===")
+
+        foto = "https://storage.googleapis.com/bucket/images/abc/original.jpg"
+        poi_id = client.post("/poi/createPois", json={**sample_poi_data, "foto_url": foto}).json()["id"]
+        client.post("/flora/flora/", json={"nombre_cientifico": "Cattleya trianae", "nombre_comun": "Flor de mayo", "familia": "Orchidaceae", "foto_url": foto, "poi_id": poi_id})
+        client.post("/fauna/createFauna", json={"nombre_cientifico": "Vultur gryphus", "nombre_comun": "Cóndor", "especie": "Ave", "habitat": "Páramo", "foto_url": foto, "poi_id": poi_id})
+
+        db.expire_all()
+        for include_children, schema in ((True, schemas.POI), (False, schemas.POISimple)):
+            response = client.get(f"/poi/getAllPois?skip=0&limit=1000&include_children={str(include_children).lower()}")
+            assert response.status_code == 200
+            pois = db.query(POI).order_by(POI.id).limit(1000).all()
+            expected = TypeAdapter(list[schema]).dump_python(TypeAdapter(list[schema]).validate_python(pois, from_attributes=True), mode="json")
+            assert response.json() == expected, "La ruta rápida difiere del response_model"
+
+        poi = next(poi for poi in response.json() if poi["id"] == poi_id)
+        assert poi["foto_variantes"]["thumb"].endswith("/images/abc/thumb.webp")
+        logger.info("✓ Ruta rápida verificada")
+
+    @pytest.mark.it("Debe resumir cada POI con la cantidad de flora y fauna")
+    def test_poi_summary(self, client, db, sample_poi_data):
+        """
+        ID de la prueba: POI_CRUD_013
+        Descripción: /poi/summary y getPoiById?summary=true con conteos agregados
+        Entradas:
+            - Un POI con dos floras y una fauna
+        Resultados esperados:
+            - Los conteos son 2 y 1 y la respuesta no incluye las listas
+            - Se calculan en una sola consulta
+            - Una flora nueva actualiza el resumen cacheado
+        """
+        logger.info("\n=== Iniciando prueba de resumen de POIs ===")
+
+        poi_id = client.post("/poi/createPois", json=sample_poi_data).json()["id"]
+        flora = {"nombre_cientifico": "Cattleya trianae", "nombre_comun": "Flor de mayo", "familia": "Orchidaceae", "foto_url": "http://ejemplo.com/f.jpg", "poi_id": poi_id}
+        client.post("/flora/flora/", json=flora)
+        client.post("/flora/flora/", json=flora)
+        client.post("/fauna/createFauna", json={"nombre_cientifico": "Vultur gryphus", "nombre_comun": "Cóndor", "especie": "Ave", "habitat": "Páramo", "foto_url": "http://ejemplo.com/c.jpg", "poi_id": poi_id})
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(Engine, "before_cursor_execute", listener)
+        try:
+            response = client.get(f"/poi/getPoiById/{poi_id}?summary=true")
+        finally:
+            event.remove(Engine, "before_cursor_execute", listener)
+        assert response.status_code == 200
+        resumen = response.json()
+        assert (resumen["cantidad_flora"], resumen["cantidad_fauna"]) == (2, 1)
+        assert "flora" not in resumen and "fauna" not in resumen
+        assert len(statements) == 1, f"Se esperaba una consulta, hubo {len(statements)}"
+
+        response = client.get("/poi/summary?skip=0&limit=1000")
+        assert response.status_code == 200
+        resumen = next(poi for poi in response.json() if poi["id"] == poi_id)
+        assert (resumen["cantidad_flora"], resumen["cantidad_fauna"]) == (2, 1)
+
+        client.post("/flora/flora/", json=flora)
+        assert client.get(f"/poi/getPoiById/{poi_id}?summary=true").json()["cantidad_flora"] == 3
+        resumen = next(poi for poi in client.get("/poi/summary?skip=0&limit=1000").json() if poi["id"] == poi_id)
+        assert resumen["cantidad_flora"] == 3, "El resumen cacheado no se invalidó"
+
+        assert client.get("/poi/getPoiById/999999?summary=true").status_code == 404
+        logger.info("✓ Resumen verificado")
+
+    @pytest.mark.it("Debe limitar los POIs a los campos pedidos y cargar hijos solo si se piden")
+    def test_poi_sparse_fields(self, client, db, sample_poi_data):
+        """
+        ID de la prueba: POI_CRUD_014
+        Descripción: Parámetro fields= en getAllPois y getPoiById
+        Entradas:
+            - Un POI con una flora
+        Resultados esperados:
+            - fields=nombre,tipo devuelve solo id, nombre y tipo sin consultar flora ni fauna
+            - fields=nombre,flora incluye la flora completa
+            - Código 400 para un campo desconocido o fuera del esquema sin hijos
+        """
+        logger.info("\n=== Iniciando prueba de campos parciales de POI ===")
+
+        poi_id = client.post("/poi/createPois", json=sample_poi_data).json()["id"]
+        client.post("/flora/flora/", json={"nombre_cientifico": "Cattleya trianae", "nombre_comun": "Flor de mayo", "familia": "Orchidaceae", "foto_url": "http://ejemplo.com/f.jpg", "poi_id": poi_id})
+
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(Engine, "before_cursor_execute", listener)
+        try:
+            response = client.get("/poi/getAllPois?limit=1000&fields=nombre,tipo")
+        finally:
+            event.remove(Engine, "before_cursor_execute", listener)
+        assert response.status_code == 200
+        poi = next(item for item in response.json() if item["id"] == poi_id)
+        assert poi == {"id": poi_id, "nombre": sample_poi_data["nombre"], "tipo": sample_poi_data["tipo"]}
+        assert not any("FROM flora" in statement or "FROM fauna" in statement for statement in statements)
+
+        response = client.get(f"/poi/getPoiById/{poi_id}?fields=nombre,flora")
+        assert response.status_code == 200
+        poi = response.json()
+        assert set(poi) == {"id", "nombre", "flora"}
+        assert [flora["nombre_comun"] for flora in poi["flora"]] == ["Flor de mayo"]
+
+        assert client.get(f"/poi/getPoiById/{poi_id}?fields=nombre,altura").status_code == 400
+        assert client.get("/poi/getAllPois?include_children=false&fields=flora").status_code == 400
+        logger.info("✓ Campos parciales verificados")
+
+    @pytest.mark.it("Debe eliminar POIs con su flora y fauna, uno o en lote")
+    def test_delete_cascade_and_bulk(self, client, db, sample_poi_data):
+        """
+        ID de la prueba: POI_CRUD_015
+        Descripción: Borrado en cascada de un POI y borrado en lote de POIs y flora
+        Entradas:
+            - POIs con flora y fauna
+            - Lotes de ids con un id inexistente
+        Resultados esperados:
+            - Al eliminar un POI se eliminan su flora y fauna, también del cache
+            - /poi/bulkDelete elimina N POIs con sus hijos en tres DELETE
+            - /flora/bulkDelete reporta los ids inexistentes en not_found
+        """
+        logger.info("\n=== Iniciando prueba de borrado en cascada y en lote ===")
+
+        def crear_poi_con_hijos():
+            poi_id = client.post("/poi/createPois", json=sample_poi_data).json()["id"]
+            flora_id = client.post("/flora/flora/", json={"nombre_cientifico": "Cattleya trianae", "nombre_comun": "Flor de mayo", "familia": "Orchidaceae", "foto_url": "http://ejemplo.com/f.jpg", "poi_id": poi_id}).json()["id"]
+            fauna_id = client.post("/fauna/createFauna", json={"nombre_cientifico": "Vultur gryphus", "nombre_comun": "Cóndor", "especie": "Ave", "habitat": "Páramo", "foto_url": "http://ejemplo.com/c.jpg", "poi_id": poi_id}).json()["id"]
+            return poi_id, flora_id, fauna_id
+
+        poi_id, flora_id, fauna_id = crear_poi_con_hijos()
+        assert client.get(f"/flora/getFloraById/{flora_id}").status_code == 200
+        assert client.delete(f"/poi/deletePoisById/{poi_id}").status_code == 200
+        assert client.get(f"/flora/getFloraById/{flora_id}").status_code == 404, "La flora del POI no se eliminó"
+        assert client.get(f"/fauna/getFaunaById/{fauna_id}").status_code == 404, "La fauna del POI no se eliminó"
+
+        creados = [crear_poi_con_hijos() for _ in range(3)]
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(Engine, "before_cursor_execute", listener)
+        try:
+            response = client.post("/poi/bulkDelete", json=[poi for poi, _, _ in creados] + [999999])
+        finally:
+            event.remove(Engine, "before_cursor_execute", listener)
+        assert response.status_code == 200
+        assert response.json() == {"deleted": [poi for poi, _, _ in creados], "not_found": [999999]}
+        assert sum(statement.lstrip().upper().startswith("DELETE") for statement in statements) == 3
+        assert all(client.get(f"/fauna/getFaunaById/{fauna}").status_code == 404 for _, _, fauna in creados)
+
+        poi_id, flora_id, _ = crear_poi_con_hijos()
+        otra = client.post("/flora/flora/", json={"nombre_cientifico": "Espeletia", "nombre_comun": "Frailejón", "familia": "Asteraceae", "foto_url": "http://ejemplo.com/e.jpg", "poi_id": poi_id}).json()["id"]
+        response = client.post("/flora/bulkDelete", json=[flora_id, otra, 999999])
+        assert response.json() == {"deleted": sorted([flora_id, otra]), "not_found": [999999]}
+        assert client.get(f"/poi/getPoiById/{poi_id}").json()["flora"] == [], "El detalle del POI no se invalidó"
+        logger.info("✓ Borrado en cascada y en lote verificado")
+
+    @pytest.mark.it("Debe incluir en nearby los POIs justo dentro del radio")
+    def test_nearby_radius_edge(self, client, db, sample_poi_data):
+        """
+        ID de la prueba: POI_CRUD_016
+        Descripción: Ventana de búsqueda de /poi/nearby en el borde del radio
+        Entradas:
+            - POIs a 999.6 m de un centro ecuatorial, a 497.6 km de (80, 0) hacia el
+              este y al otro lado del polo norte
+        Resultados esperados:
+            - Cada POI aparece en nearby con el radio que lo contiene
+            - La distancia reportada no supera el radio
+        """
+        logger.info("\n=== Iniciando prueba del borde del radio en nearby ===")
+        from app.services.spatialIndexService import EARTH_RADIUS_M
+
+        def destino(lat, lon, metros, rumbo):
+            # Punto a `metros` de (lat, lon) con rumbo en grados (fórmula del gran círculo)
+            phi, lam, theta, delta = math.radians(lat), math.radians(lon), math.radians(rumbo), metros / EARTH_RADIUS_M
+            phi2 = math.asin(math.sin(phi) * math.cos(delta) + math.cos(phi) * math.sin(delta) * math.cos(theta))
+            lam2 = lam + math.atan2(math.sin(theta) * math.sin(delta) * math.cos(phi), math.cos(delta) - math.sin(phi) * math.sin(phi2))
+            return math.degrees(phi2), (math.degrees(lam2) + 540.0) % 360.0 - 180.0
+
+        casos = [
+            (4.61, -74.08, 999.6, 90.0, 1000),
+            (4.61, -74.08, 999.6, 0.0, 1000),
+            (80.0, 0.0, 497600.0, 90.0, 500000),
+            (80.0, 179.0, 497600.0, 60.0, 500000),
+            (89.9, 0.0, 40000.0, 0.0, 50000),
+        ]
+        for lat, lon, metros, rumbo, radio in casos:
+            poi_lat, poi_lon = destino(lat, lon, metros, rumbo)
+            poi_id = client.post("/poi/createPois", json={**sample_poi_data, "latitud": poi_lat, "longitud": poi_lon}).json()["id"]
+            response = client.get(f"/poi/nearby?lat={lat}&lon={lon}&radius={radio}&limit=5000")
+            assert response.status_code == 200
+            encontrados = {poi["id"]: poi["distancia"] for poi in response.json()}
+            assert poi_id in encontrados, f"Falta el POI a {metros} m de ({lat}, {lon}) con radio {radio}"
+            assert encontrados[poi_id] <= radio
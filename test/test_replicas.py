@@ -0,0 +1,148 @@
+import pytest
+from fastapi import Response
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+from starlette.requests import Request
+import logging
+from app.services.cacheService import CacheService, MemoryCacheBackend
+from app.services.databaseService import READ_PRIMARY_COOKIE, ReplicaSet
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def make_request(cookie: str = None) -> Request:
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+@pytest.fixture
+def engines(tmp_path):
+    """
+    Engines SQLite: primario, una réplica sana y una réplica que no puede conectar
+    """
+    engines = {
+        "primary": create_engine(f"sqlite:///{tmp_path / 'primary.db'}"),
+        "replica": create_engine(f"sqlite:///{tmp_path / 'replica.db'}"),
+        "down": create_engine(f"sqlite:///{tmp_path / 'no_existe' / 'replica.db'}"),
+    }
+    try:
+        yield engines
+    finally:
+        for engine in engines.values():
+            engine.dispose()
+
+@pytest.mark.describe("Suite de pruebas de réplicas de lectura")
+class TestReplicas:
+
+    @pytest.mark.it("Debe leer de las réplicas sanas y usar el primario como respaldo")
+    def test_replica_routing_and_fallback(self, engines):
+        """
+        ID de la prueba: REPLICAS_001
+        Descripción: Rotación de réplicas con una réplica caída
+        Entradas:
+            - Una réplica que falla al conectar y una réplica sana
+        Resultados esperados:
+            - Las lecturas van siempre a la réplica sana
+            - La réplica caída queda marcada y fuera de la rotación
+            - Sin réplicas disponibles la lectura usa el primario
+        """
+        logger.info("\n=== Iniciando prueba de réplicas de lectura ===")
+        primary = sessionmaker(bind=engines["primary"])
+        replicas = ReplicaSet(
+            [sessionmaker(bind=engines["down"]), sessionmaker(bind=engines["replica"])], [],
+            retry_seconds=60, read_your_writes_seconds=5,
+        )
+
+        for _ in range(4):
+            db = replicas.session(make_request(), primary)
+            assert db.get_bind() is engines["replica"]
+            db.close()
+        status = replicas.status()
+        assert [replica["healthy"] for replica in status["replicas"]] == [False, True]
+        assert status["replica_reads"] == 4 and status["primary_reads"] == 0
+
+        only_down = ReplicaSet([sessionmaker(bind=engines["down"])], [], retry_seconds=60, read_your_writes_seconds=5)
+        db = only_down.session(make_request(), primary)
+        assert db.get_bind() is engines["primary"]
+        db.close()
+
+    @pytest.mark.it("Debe leer del primario después de una escritura del mismo cliente")
+    def test_read_your_writes(self, engines):
+        """
+        ID de la prueba: REPLICAS_002
+        Descripción: Lectura desde el primario tras una escritura
+        Entradas:
+            - Una réplica sana y una escritura registrada
+        Resultados esperados:
+            - La escritura devuelve la cookie read_primary con la duración de la ventana
+            - Las peticiones de otros clientes siguen leyendo de la réplica
+            - Una petición con la cookie lee del primario
+        """
+        primary = sessionmaker(bind=engines["primary"])
+        replicas = ReplicaSet([sessionmaker(bind=engines["replica"])], [], retry_seconds=60, read_your_writes_seconds=5)
+
+        response = Response()
+        replicas.record_write(response)
+        assert f"{READ_PRIMARY_COOKIE}=1" in response.headers["set-cookie"]
+        assert "Max-Age=5" in response.headers["set-cookie"]
+        assert replicas.session(make_request(), primary).get_bind() is engines["replica"]
+        assert replicas.session(make_request(f"{READ_PRIMARY_COOKIE}=1"), primary).get_bind() is engines["primary"]
+
+        # Sin réplicas configuradas una escritura no envía la cookie
+        response = Response()
+        ReplicaSet([], [], retry_seconds=60, read_your_writes_seconds=5).record_write(response)
+        assert "set-cookie" not in response.headers
+
+    @pytest.mark.it("Debe usar otra réplica cuando el pool de una está agotado")
+    def test_pool_timeout_fallback(self, engines, tmp_path):
+        """
+        ID de la prueba: REPLICAS_003
+        Descripción: Réplica sin conexiones libres en el pool
+        Entradas:
+            - Una réplica con pool de una conexión ocupada y una réplica sana
+        Resultados esperados:
+            - El timeout del checkout marca la réplica como caída
+            - La lectura pasa a la réplica sana en lugar de fallar
+        """
+        busy = create_engine(f"sqlite:///{tmp_path / 'busy.db'}", poolclass=QueuePool, pool_size=1, max_overflow=0, pool_timeout=0.1)
+        held = busy.connect()
+        try:
+            primary = sessionmaker(bind=engines["primary"])
+            replicas = ReplicaSet(
+                [sessionmaker(bind=busy), sessionmaker(bind=engines["replica"])], [],
+                retry_seconds=60, read_your_writes_seconds=5,
+            )
+            db = replicas.session(make_request(), primary)
+            assert db.get_bind() is engines["replica"]
+            db.close()
+            assert [replica["healthy"] for replica in replicas.status()["replicas"]] == [False, True]
+        finally:
+            held.close()
+            busy.dispose()
+
+    @pytest.mark.it("No debe cachear lecturas durante el retraso de replicación")
+    def test_cache_skips_recent_writes(self):
+        """
+        ID de la prueba: REPLICAS_004
+        Descripción: Caché con réplicas tras una invalidación
+        Entradas:
+            - Un CacheService con replica_lag_seconds y una invalidación de flora 1
+        Resultados esperados:
+            - Las listas de flora y el detalle de flora 1 no tienen clave ni se guardan
+            - Otros elementos y namespaces siguen cacheándose
+        """
+        cache = CacheService(MemoryCacheBackend())
+        cache.replica_lag_seconds = 5
+        cache.invalidate("flora", 1)
+
+        assert cache.list_key("flora") is None
+        assert cache.detail_key("flora", 1) is None
+        assert cache.store(None, b"[]").body == b"[]"
+        assert cache.get(None) is None
+        assert cache.backend.stats()["entries"] == 2  # solo las marcas de retraso
+
+        key = cache.detail_key("flora", 2)
+        cache.store(key, b"{}")
+        assert cache.get(key).body == b"{}"
+        assert cache.list_key("fauna") is not None
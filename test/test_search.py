@@ -0,0 +1,132 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import logging
+from main import app
+from app.database import Base
+from app.services.databaseService import DatabaseService
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Create test database engine
+SQLALCHEMY_DATABASE_URL = "sqlite:///./testdb.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL)
+
+# Create TestingSessionLocal class
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+Base.metadata.create_all(bind=engine)
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+app.dependency_overrides[DatabaseService.get_db] = override_get_db
+app.dependency_overrides[DatabaseService.get_read_db] = override_get_db
+
+@pytest.fixture(scope="session")
+def db():
+    """
+    Fixture that creates a test database session that persists across all tests
+    """
+    Base.metadata.create_all(bind=engine)
+    db = TestingSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+@pytest.fixture(scope="module")
+def catalog():
+    """
+    Catálogo mínimo con nombres acentuados para las búsquedas
+    """
+    client = TestClient(app)
+    poi_id = client.post("/poi/createPois", json={
+        "nombre": "Jardín Botánico Orquídea Real",
+        "descripcion": "Colección de orquídeas",
+        "foto_url": "http://ejemplo.com/jardin.jpg",
+        "tipo": "Natural",
+        "longitud": -74.0817,
+        "latitud": 4.6097
+    }).json()["id"]
+    flora = client.post("/flora/flora/", json={
+        "nombre_cientifico": "Cattleya trianae",
+        "nombre_comun": "Orquídea",
+        "familia": "Orchidaceae",
+        "foto_url": "http://ejemplo.com/orquidea.jpg",
+        "poi_id": poi_id
+    }).json()
+    fauna = client.post("/fauna/createFauna", json={
+        "nombre_cientifico": "Colibri coruscans",
+        "nombre_comun": "Colibrí Chillón",
+        "especie": "Ave",
+        "habitat": "Bosque andino",
+        "foto_url": "http://ejemplo.com/colibri.jpg",
+        "poi_id": poi_id
+    }).json()
+    return {"poi_id": poi_id, "flora_id": flora["id"], "fauna_id": fauna["id"]}
+
+@pytest.mark.describe("Suite de pruebas de búsqueda por nombre")
+class TestSearch:
+
+    @pytest.mark.it("Debe encontrar resultados sin distinguir tildes ni mayúsculas")
+    def test_search_accent_insensitive(self, client, db, catalog):
+        """
+        ID de la prueba: SEARCH_001
+        Descripción: Búsqueda por nombre común, científico y de POI
+        Entradas:
+            - Términos sin tildes y en mayúsculas
+        Resultados esperados:
+            - Código 200
+            - Se encuentran la flora, la fauna y el POI correspondientes
+        """
+        logger.info("\n=== Iniciando prueba de búsqueda sin tildes ===")
+
+        response = client.get("/search?q=COLIBRI")
+        assert response.status_code == 200, "Error en la búsqueda"
+        assert ("fauna", catalog["fauna_id"]) in [(r["entidad"], r["id"]) for r in response.json()]
+
+        response = client.get("/search?q=trianae")
+        assert ("flora", catalog["flora_id"]) in [(r["entidad"], r["id"]) for r in response.json()]
+
+        response = client.get("/search?q=jardin botanico")
+        assert ("poi", catalog["poi_id"]) in [(r["entidad"], r["id"]) for r in response.json()]
+
+    @pytest.mark.it("Debe ordenar por coincidencia exacta, prefijo y subcadena")
+    def test_search_ranking(self, client, db, catalog):
+        """
+        ID de la prueba: SEARCH_002
+        Descripción: Ranking y paginación de resultados
+        Entradas:
+            - Término que coincide exacto con la flora y como subcadena con el POI
+        Resultados esperados:
+            - La flora (exacta) aparece antes que el POI (subcadena)
+            - limit restringe el número de resultados
+            - Código 422 para términos demasiado cortos
+        """
+        logger.info("\n=== Iniciando prueba de ranking de búsqueda ===")
+
+        response = client.get("/search?q=orquidea&limit=50")
+        results = [(r["entidad"], r["id"], r["rank"]) for r in response.json()]
+        assert ("flora", catalog["flora_id"], 0) in results
+        assert ("poi", catalog["poi_id"], 2) in results
+        assert results.index(("flora", catalog["flora_id"], 0)) < results.index(("poi", catalog["poi_id"], 2))
+        assert [rank for _, _, rank in results] == sorted(rank for _, _, rank in results)
+
+        response = client.get("/search?q=orquidea&limit=1")
+        assert len(response.json()) == 1, "La paginación excede el límite especificado"
+
+        response = client.get("/search?q=o")
+        assert response.status_code == 422, "Se esperaba error 422 para un término corto"